@@ -4,6 +4,7 @@ import json
 import logging
 from typing import Dict, Any
 from quiz_solver_vercel import QuizSolver
+from http_client import close_http_client
 import config
 
 # Configure logging
@@ -55,8 +56,12 @@ def solve_quiz_gradio(email: str, secret: str, quiz_url: str) -> str:
         # Run the async function
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(solve_quiz_async(email, secret, quiz_url))
-        loop.close()
+        try:
+            result = loop.run_until_complete(solve_quiz_async(email, secret, quiz_url))
+        finally:
+            # The pooled HTTP session is bound to this loop; close it while the loop can
+            loop.run_until_complete(close_http_client())
+            loop.close()
         
         # Format the response
         if result["success"]:
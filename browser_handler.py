@@ -1,49 +1,166 @@
 from playwright.async_api import async_playwright, Browser, Page
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 import base64
 import asyncio
+import time
+from contextlib import asynccontextmanager
 from typing import Optional
+import config
+from http_client import get_http_client
+
+# Resolves once #result has non-empty rendered text
+RESULT_READY_JS = """() => {
+    const el = document.querySelector('#result');
+    return !!el && el.innerText.trim().length > 0;
+}"""
+
+# Resolves once the DOM has gone quietMs without mutations, or at ceilingMs
+MUTATION_QUIET_JS = """([quietMs, ceilingMs]) => new Promise(resolve => {
+    let quietTimer;
+    const done = (reason) => {
+        observer.disconnect();
+        clearTimeout(quietTimer);
+        clearTimeout(ceilingTimer);
+        resolve(reason);
+    };
+    const observer = new MutationObserver(() => {
+        clearTimeout(quietTimer);
+        quietTimer = setTimeout(() => done('quiet'), quietMs);
+    });
+    observer.observe(document.documentElement, {
+        childList: true, subtree: true, characterData: true, attributes: true
+    });
+    quietTimer = setTimeout(() => done('quiet'), quietMs);
+    const ceilingTimer = setTimeout(() => done('ceiling'), ceilingMs);
+})"""
 
 class BrowserHandler:
     """Handles browser automation for fetching and rendering quiz pages"""
     
-    def __init__(self):
+    def __init__(self, pool=None):
         self.browser: Optional[Browser] = None
         self.playwright = None
+        self.pool = pool
+        self.render_metrics = {}
         
     async def start(self):
-        """Initialize the browser"""
+        """Initialize the browser (pooled browsers are owned by the pool)"""
+        if self.pool:
+            await self.pool.start()
+            return
         self.playwright = await async_playwright().start()
         self.browser = await self.playwright.chromium.launch(headless=True)
         
     async def stop(self):
-        """Close the browser"""
+        """Close the browser (pooled browsers stay open for the next solver)"""
         if self.browser:
             await self.browser.close()
+            self.browser = None
         if self.playwright:
             await self.playwright.stop()
+            self.playwright = None
+            
+    @asynccontextmanager
+    async def open_page(self):
+        """Open a page, leasing it from the pool when one is configured"""
+        if self.pool:
+            async with self.pool.lease() as page:
+                yield page
+            return
+            
+        if not self.browser:
+            await self.start()
+            
+        page = await self.browser.new_page()
+        try:
+            yield page
+        finally:
+            await page.close()
+            
+    def _record_render(self, strategy: str, elapsed_ms: float, hit_ceiling: bool):
+        """Record how long a readiness strategy took to settle"""
+        stats = self.render_metrics.setdefault(strategy, {
+            "count": 0, "total_ms": 0.0, "max_ms": 0.0, "ceiling_hits": 0
+        })
+        stats["count"] += 1
+        stats["total_ms"] += elapsed_ms
+        stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+        if hit_ceiling:
+            stats["ceiling_hits"] += 1
+            
+    def get_render_metrics(self) -> dict:
+        """Get per-strategy render timings, including the average wait"""
+        return {
+            strategy: {**stats, "avg_ms": stats["total_ms"] / stats["count"]}
+            for strategy, stats in self.render_metrics.items()
+        }
+            
+    async def wait_until_ready(self, page: Page, readiness: str, ceiling_ms: int) -> str:
+        """
+        Wait until the page has finished rendering its quiz content
+        
+        Args:
+            page: The page to wait on
+            readiness: 'result' (non-empty #result), 'mutation' (DOM quiet period),
+                'sleep' (fixed wait) or 'auto' (result if #result exists, else mutation)
+            ceiling_ms: Maximum time to wait (ms)
+            
+        Returns:
+            The strategy that was used
+        """
+        if readiness == "auto":
+            has_result = await page.query_selector("#result") is not None
+            readiness = "result" if has_result else "mutation"
+            
+        start = time.perf_counter()
+        hit_ceiling = False
+        
+        if readiness == "result":
+            try:
+                await page.wait_for_function(RESULT_READY_JS, timeout=ceiling_ms)
+            except PlaywrightTimeoutError:
+                hit_ceiling = True
+        elif readiness == "mutation":
+            reason = await page.evaluate(MUTATION_QUIET_JS, [config.RENDER_QUIET_MS, ceiling_ms])
+            hit_ceiling = reason == "ceiling"
+        else:
+            await asyncio.sleep(ceiling_ms / 1000)
+            hit_ceiling = True
+            
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self._record_render(readiness, elapsed_ms, hit_ceiling)
+        print(f"Page ready via '{readiness}' in {elapsed_ms:.0f} ms"
+              f"{' (ceiling reached)' if hit_ceiling else ''}")
+        return readiness
             
-    async def fetch_quiz_page(self, url: str, wait_time: int = 3000) -> dict:
+    async def fetch_quiz_page(self, url: str, wait_time: int = 3000, readiness: str = None,
+                              timeout: float = None) -> dict:
         """
         Fetch and render a quiz page, extracting the content
         
         Args:
             url: The quiz page URL
-            wait_time: Time to wait for JavaScript rendering (ms)
+            wait_time: Maximum time to wait for JavaScript rendering (ms)
+            readiness: Readiness strategy (defaults to config.RENDER_READINESS)
+            timeout: Seconds for the whole render; navigation and readiness waits are capped to fit
             
         Returns:
             dict with 'html', 'text', and 'decoded_content' keys
         """
-        if not self.browser:
-            await self.start()
-            
-        page = await self.browser.new_page()
-        
-        try:
+        deadline = time.monotonic() + timeout if timeout else None
+        async with self.open_page() as page:
             # Navigate to the page
-            await page.goto(url, wait_until="networkidle", timeout=30000)
+            goto_ms = 30000 if deadline is None else min(30000, timeout * 1000)
+            await page.goto(url, wait_until="networkidle", timeout=goto_ms)
             
-            # Wait for JavaScript rendering
-            await asyncio.sleep(wait_time / 1000)
+            # Wait for JavaScript rendering, using wait_time only as a ceiling
+            if deadline is not None:
+                wait_time = min(wait_time, int((deadline - time.monotonic()) * 1000))
+            # Playwright treats a timeout of 0 as no timeout, so an exhausted budget skips the wait
+            if wait_time > 0:
+                await self.wait_until_ready(page, readiness or config.RENDER_READINESS, wait_time)
+            else:
+                print("No render time left, reading the page as loaded")
             
             # Get the page content
             html = await page.content()
@@ -65,9 +182,6 @@ class BrowserHandler:
                 "decoded_content": decoded_content or text
             }
             
-        finally:
-            await page.close()
-            
     async def download_file(self, url: str, save_path: str) -> str:
         """
         Download a file from a URL
@@ -79,32 +193,23 @@ class BrowserHandler:
         Returns:
             Path to the downloaded file
         """
-        if not self.browser:
-            await self.start()
-            
-        page = await self.browser.new_page()
-        
         try:
-            # Set up download handling
-            async with page.expect_download() as download_info:
-                await page.goto(url)
-            
-            download = await download_info.value
-            await download.save_as(save_path)
-            return save_path
+            async with self.open_page() as page:
+                # Set up download handling
+                async with page.expect_download() as download_info:
+                    await page.goto(url)
+                
+                download = await download_info.value
+                await download.save_as(save_path)
+                return save_path
             
         except Exception as e:
             # If direct download fails, try alternative method
             print(f"Download via browser failed: {e}, trying direct request")
-            import aiohttp
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        content = await response.read()
-                        with open(save_path, 'wb') as f:
-                            f.write(content)
-                        return save_path
+            async with get_http_client().request("GET", url) as response:
+                if response.status == 200:
+                    content = await response.read()
+                    with open(save_path, 'wb') as f:
+                        f.write(content)
+                    return save_path
             raise
-            
-        finally:
-            await page.close()
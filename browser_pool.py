@@ -0,0 +1,152 @@
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+import config
+
+class PooledPage:
+    """A reusable page slot bound to one browser context"""
+
+    def __init__(self, browser_index: int, context: BrowserContext, page: Page):
+        self.browser_index = browser_index
+        self.context = context
+        self.page = page
+        self.uses = 0
+
+class BrowserPool:
+    """App-lifetime pool of Chromium browsers whose pages are leased to solvers"""
+
+    def __init__(self, browsers: int = None, contexts_per_browser: int = None,
+                 max_page_uses: int = None):
+        self.num_browsers = browsers or config.BROWSER_POOL_BROWSERS
+        self.contexts_per_browser = contexts_per_browser or config.BROWSER_POOL_CONTEXTS
+        self.max_page_uses = max_page_uses or config.BROWSER_POOL_MAX_PAGE_USES
+        self.playwright = None
+        self.browsers: list = []
+        self._slots: Optional[asyncio.Queue] = None
+        self._start_lock = asyncio.Lock()
+        self.started = False
+
+        # Metrics
+        self.leases = 0
+        self.leased = 0
+        self.total_lease_wait_ms = 0.0
+        self.max_lease_wait_ms = 0.0
+        self.recycles = 0
+        self.failed_health_checks = 0
+
+    @property
+    def size(self) -> int:
+        """Total number of page slots in the pool"""
+        return self.num_browsers * self.contexts_per_browser
+
+    async def start(self):
+        """Launch the browsers and open one page per context"""
+        async with self._start_lock:
+            if self.started:
+                return
+            self.playwright = await async_playwright().start()
+            self._slots = asyncio.Queue()
+            for index in range(self.num_browsers):
+                browser = await self.playwright.chromium.launch(headless=True)
+                self.browsers.append(browser)
+                for _ in range(self.contexts_per_browser):
+                    self._slots.put_nowait(await self._new_slot(index))
+            self.started = True
+            print(f"Browser pool started: {self.num_browsers} browser(s) x "
+                  f"{self.contexts_per_browser} context(s)")
+
+    async def stop(self):
+        """Close all browsers and stop Playwright"""
+        async with self._start_lock:
+            for browser in self.browsers:
+                try:
+                    await browser.close()
+                except Exception as e:
+                    print(f"Error closing pooled browser: {e}")
+            self.browsers = []
+            if self.playwright:
+                await self.playwright.stop()
+                self.playwright = None
+            self._slots = None
+            self.started = False
+
+    async def _new_slot(self, browser_index: int) -> PooledPage:
+        """Open a fresh context and page on the given browser"""
+        browser: Browser = self.browsers[browser_index]
+        if not browser.is_connected():
+            browser = await self.playwright.chromium.launch(headless=True)
+            self.browsers[browser_index] = browser
+        context = await browser.new_context(accept_downloads=True)
+        page = await context.new_page()
+        return PooledPage(browser_index, context, page)
+
+    async def _is_healthy(self, slot: PooledPage) -> bool:
+        """Check that a returned page is still usable and reset it for the next lease"""
+        if slot.page.is_closed() or slot.uses >= self.max_page_uses:
+            return False
+        try:
+            await asyncio.wait_for(slot.page.goto("about:blank"), timeout=5)
+            await slot.context.clear_cookies()
+            return True
+        except Exception:
+            self.failed_health_checks += 1
+            return False
+
+    async def _recycle(self, slot: PooledPage) -> PooledPage:
+        """Replace an unhealthy or worn-out slot with a fresh context and page"""
+        self.recycles += 1
+        try:
+            await slot.context.close()
+        except Exception:
+            pass
+        return await self._new_slot(slot.browser_index)
+
+    @asynccontextmanager
+    async def lease(self):
+        """
+        Lease a page from the pool for the duration of the block
+
+        Yields:
+            A Playwright Page that is returned to the pool afterwards
+        """
+        if not self.started:
+            await self.start()
+
+        wait_start = time.perf_counter()
+        slot: PooledPage = await self._slots.get()
+        wait_ms = (time.perf_counter() - wait_start) * 1000
+        self.leases += 1
+        self.leased += 1
+        self.total_lease_wait_ms += wait_ms
+        self.max_lease_wait_ms = max(self.max_lease_wait_ms, wait_ms)
+
+        try:
+            slot.uses += 1
+            yield slot.page
+        finally:
+            self.leased -= 1
+            try:
+                if not await self._is_healthy(slot):
+                    slot = await self._recycle(slot)
+            except Exception as e:
+                print(f"Error recycling pooled page: {e}")
+            if self._slots is not None:
+                self._slots.put_nowait(slot)
+
+    def get_stats(self) -> dict:
+        """Get pool size, lease wait and recycle metrics"""
+        return {
+            "started": self.started,
+            "browsers": self.num_browsers,
+            "contexts_per_browser": self.contexts_per_browser,
+            "size": self.size,
+            "available": self._slots.qsize() if self._slots else 0,
+            "leased": self.leased,
+            "leases": self.leases,
+            "avg_lease_wait_ms": self.total_lease_wait_ms / self.leases if self.leases else 0.0,
+            "max_lease_wait_ms": self.max_lease_wait_ms,
+            "recycles": self.recycles,
+            "failed_health_checks": self.failed_health_checks,
+        }
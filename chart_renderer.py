@@ -0,0 +1,117 @@
+import asyncio
+import base64
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from typing import Optional
+import pandas as pd
+import config
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+def _init_worker():
+    """Set the Agg backend and import pyplot once per worker process"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot  # noqa: F401
+
+def _get_executor() -> ProcessPoolExecutor:
+    """Create the shared rendering process pool on first use"""
+    global _executor
+    if _executor is None:
+        # Spawn rather than fork, so workers do not inherit the event loop or open sockets
+        _executor = ProcessPoolExecutor(max_workers=config.CHART_WORKERS, initializer=_init_worker,
+                                        mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+def _dpi_steps(dpi: int, min_dpi: int) -> list:
+    """DPIs to try, each about 20% lower than the last"""
+    steps = [dpi]
+    while steps[-1] > min_dpi:
+        steps.append(max(min_dpi, int(steps[-1] * 0.8)))
+    return steps
+
+def _quantize(buffer: BytesIO, colors: int) -> BytesIO:
+    """Re-encode a PNG with an adaptive palette"""
+    from PIL import Image
+    buffer.seek(0)
+    with Image.open(buffer) as image:
+        paletted = image.convert('RGB').quantize(colors=colors)
+    out = BytesIO()
+    paletted.save(out, format='png', optimize=True)
+    return out
+
+def render_chart(data: pd.DataFrame, chart_type: str = "bar", max_bytes: int = None,
+                 dpi: int = None, min_dpi: int = None) -> str:
+    """
+    Render a chart as a PNG data URI within a size budget (runs in a worker process)
+
+    The figure is drawn once; if the PNG is over budget it is re-encoded with a
+    reduced palette, then saved again at lower DPIs until it fits or min_dpi is reached.
+
+    Args:
+        data: DataFrame to visualize
+        chart_type: Type of chart (bar, line, scatter, etc.)
+        max_bytes: Budget for the encoded data URI (defaults to config.CHART_MAX_BYTES)
+        dpi: Starting resolution (defaults to config.CHART_DPI)
+        min_dpi: Lowest resolution to try (defaults to config.CHART_MIN_DPI)
+
+    Returns:
+        Base64 encoded image string with data URI prefix
+    """
+    # Already imported with the Agg backend by _init_worker
+    import matplotlib.pyplot as plt
+
+    max_bytes = max_bytes or config.CHART_MAX_BYTES
+    prefix = "data:image/png;base64,"
+    # base64 expands by 4/3, so this is the raw PNG size that fits the budget
+    png_budget = (max_bytes - len(prefix)) * 3 // 4
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+    try:
+        if chart_type == "bar":
+            data.plot(kind='bar', ax=ax)
+        elif chart_type == "line":
+            data.plot(kind='line', ax=ax)
+        elif chart_type == "scatter" and len(data.columns) >= 2:
+            ax.scatter(data.iloc[:, 0], data.iloc[:, 1])
+        else:
+            data.plot(ax=ax)
+        fig.tight_layout()
+
+        for step in _dpi_steps(dpi or config.CHART_DPI, min_dpi or config.CHART_MIN_DPI):
+            buffer = BytesIO()
+            fig.savefig(buffer, format='png', dpi=step)
+            if buffer.getbuffer().nbytes > png_budget:
+                buffer = _quantize(buffer, config.CHART_PALETTE_COLORS)
+            if buffer.getbuffer().nbytes <= png_budget:
+                break
+        else:
+            print(f"Chart is {buffer.getbuffer().nbytes} bytes, over the {png_budget} byte budget")
+    finally:
+        plt.close(fig)
+
+    # Encode straight from the buffer's memory instead of copying it out with read()
+    return prefix + base64.b64encode(buffer.getbuffer()).decode('ascii')
+
+class ChartRenderer:
+    """Renders charts in a shared process pool, off the event loop"""
+
+    def render(self, data: pd.DataFrame, chart_type: str = "bar", max_bytes: int = None) -> str:
+        """
+        Render in the pool and wait for the data URI, for code without an event loop
+
+        Raises:
+            RuntimeError: When called on a running event loop, which it would block
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return _get_executor().submit(render_chart, data, chart_type, max_bytes).result()
+        raise RuntimeError("ChartRenderer.render would block the event loop; await render_async instead")
+
+    async def render_async(self, data: pd.DataFrame, chart_type: str = "bar",
+                           max_bytes: int = None) -> str:
+        """Render in the pool without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_executor(), render_chart, data, chart_type, max_bytes)
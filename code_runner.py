@@ -0,0 +1,295 @@
+import asyncio
+import json
+import os
+import pwd
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from multiprocessing.connection import Connection
+from typing import Optional
+import config
+
+CODE_INSTRUCTIONS = """
+You can also answer by writing Python that is run on the downloaded files: {files}.
+To do so, include a "code" field holding a Python snippet. `files` (list of paths), `pd`, `np`
+and `plt` are already defined. Assign the final answer to a variable named `result`
+(a number, string, boolean, list/dict, or a base64 data URI for charts). print() output is logged.
+Omit "code" when no computation is needed.
+"""
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "code_worker.py")
+
+# Runs as root inside the worker's new mount namespace: makes the world-writable
+# directories read-only, leaves $HOME as the one writable place, then runs "$@"
+MOUNT_SETUP = (
+    'set -e; for d in /tmp /var/tmp /dev/shm; do if [ -d "$d" ]; then '
+    'mount --bind "$d" "$d"; mount -o remount,bind,ro "$d"; fi; done; '
+    'mount --bind "$HOME" "$HOME"; mount -o remount,bind,rw "$HOME"; exec "$@"'
+)
+
+def sandbox_available() -> bool:
+    """Whether workers can be sandboxed: root to switch users and unshare for the namespaces"""
+    return hasattr(os, "geteuid") and os.geteuid() == 0 and shutil.which("unshare") is not None
+
+class CodeWorker:
+    """
+    One pre-warmed sandboxed worker process, its pipe and its home directory
+
+    The worker runs as config.CODE_SANDBOX_USER in network and mount namespaces
+    of its own: no network at all, and every directory but its home is either
+    not writable by that user or remounted read-only. Its environment holds only
+    PATH, locale and matplotlib settings. Input files are linked into the home,
+    read-only, for each run.
+    """
+
+    def __init__(self, memory_mb: int, user: str):
+        account = pwd.getpwnam(user)
+        self.home = tempfile.mkdtemp(prefix="code-worker-")
+        os.chown(self.home, account.pw_uid, account.pw_gid)
+        # Inside the home, so the sandbox user can read it wherever the app is installed
+        script = shutil.copy(WORKER_SCRIPT, self.home)
+        env = {
+            "PATH": os.defpath,
+            "HOME": self.home,
+            "TMPDIR": self.home,
+            "LANG": "C.UTF-8",
+            "MPLBACKEND": "Agg",
+            "MPLCONFIGDIR": self.home,
+        }
+        parent_sock, child_sock = socket.socketpair()
+        self.process = subprocess.Popen(
+            ["unshare", "--net", "--mount", "--", "/bin/sh", "-c", MOUNT_SETUP, "sandbox",
+             "unshare", f"--setuid={account.pw_uid}", f"--setgid={account.pw_gid}", "--",
+             sys.executable, "-I", script, str(child_sock.fileno()), str(memory_mb)],
+            env=env, cwd=self.home, stdin=subprocess.DEVNULL, pass_fds=(child_sock.fileno(),),
+            extra_groups=[], start_new_session=True
+        )
+        child_sock.close()
+        self.conn = Connection(parent_sock.detach())
+        self.runs = 0
+
+    def send(self, message: Optional[dict]):
+        self.conn.send_bytes(json.dumps(message).encode())
+
+    def recv(self) -> dict:
+        """Read the worker's next JSON message (blocks; runs in a thread)"""
+        return json.loads(self.conn.recv_bytes())
+
+    def wait_ready(self):
+        """Block until the worker has finished importing (runs in a thread)"""
+        try:
+            self.recv()
+        except EOFError:
+            self.kill()
+            raise RuntimeError(f"code worker exited during startup (exit code {self.process.returncode})")
+
+    def stage(self, files: list) -> tuple:
+        """
+        Expose input files to the worker under their own names
+
+        Returns:
+            (directory to remove after the run, paths as the worker sees them)
+        """
+        # mkdtemp rather than a fixed name the snippet could have planted a symlink at
+        inputs = tempfile.mkdtemp(prefix="inputs-", dir=self.home)
+        os.chmod(inputs, 0o755)
+        staged = []
+        try:
+            for index, path in enumerate(files):
+                name = os.path.basename(path)
+                target = os.path.join(inputs, name if name not in map(os.path.basename, staged)
+                                      else f"{index}_{name}")
+                try:
+                    os.link(path, target)
+                except OSError:
+                    shutil.copyfile(path, target)
+                # For a hard link this also opens up the cached download, which is public quiz data
+                os.chmod(target, 0o644)
+                staged.append(target)
+        except OSError:
+            shutil.rmtree(inputs, ignore_errors=True)
+            raise
+        return inputs, staged
+
+    def kill(self):
+        if self.process.poll() is None:
+            self.process.kill()
+        try:
+            self.process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            pass
+        self.conn.close()
+        shutil.rmtree(self.home, ignore_errors=True)
+
+    def close(self):
+        """Ask the worker to exit, killing it if it does not"""
+        try:
+            self.send(None)
+            self.process.wait(timeout=1)
+        except (BrokenPipeError, OSError, subprocess.TimeoutExpired):
+            pass
+        self.kill()
+
+class CodeRunner:
+    """
+    Pool of pre-warmed, sandboxed processes that run LLM-written Python against downloaded files
+
+    The code comes from an LLM reading an untrusted quiz page, so it is treated
+    as hostile: workers (see CodeWorker) run as an unprivileged user without
+    network access or credentials in their environment, and can only write to
+    their own home directory. That needs root with CAP_SYS_ADMIN (which default
+    Docker containers lack) and the unshare and mount tools. Each snippet also gets CPU-time and address-space
+    limits plus a wall-time timeout; a worker that times out or dies is killed
+    and replaced. Starting the pool fails on hosts that cannot sandbox.
+    """
+
+    def __init__(self, workers: int = None, cpu_seconds: int = None, memory_mb: int = None,
+                 timeout: float = None, max_runs: int = None):
+        self.num_workers = workers or config.CODE_WORKERS
+        self.cpu_seconds = cpu_seconds or config.CODE_CPU_SECONDS
+        self.memory_mb = memory_mb if memory_mb is not None else config.CODE_MEMORY_MB
+        self.timeout = timeout or config.CODE_TIMEOUT_SECONDS
+        self.max_runs = max_runs or config.CODE_WORKER_MAX_RUNS
+        self.user = config.CODE_SANDBOX_USER
+        self._idle: Optional[asyncio.Queue] = None
+        self._workers: list = []
+        self._respawns: set = set()
+        self._start_lock = asyncio.Lock()
+        self.started = False
+
+        # Metrics
+        self.runs = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.restarts = 0
+        self.total_run_ms = 0.0
+
+    async def _spawn(self) -> CodeWorker:
+        worker = CodeWorker(self.memory_mb, self.user)
+        await asyncio.get_running_loop().run_in_executor(None, worker.wait_ready)
+        self._workers.append(worker)
+        return worker
+
+    async def start(self):
+        """Start and warm up all workers"""
+        async with self._start_lock:
+            if self.started:
+                return
+            if not sandbox_available():
+                raise RuntimeError("code execution needs root and unshare to sandbox its workers")
+            self._idle = asyncio.Queue()
+            start = time.perf_counter()
+            workers = await asyncio.gather(*(self._spawn() for _ in range(self.num_workers)))
+            for worker in workers:
+                self._idle.put_nowait(worker)
+            self.started = True
+            print(f"Code runner started: {self.num_workers} worker(s) warm in "
+                  f"{(time.perf_counter() - start) * 1000:.0f} ms")
+
+    async def stop(self):
+        """Shut down all workers"""
+        async with self._start_lock:
+            for worker in self._workers:
+                worker.close()
+            self._workers = []
+            self._idle = None
+            self.started = False
+
+    async def _replace(self, worker: CodeWorker):
+        """Kill a worker and put a fresh one in its place"""
+        worker.kill()
+        if worker in self._workers:
+            self._workers.remove(worker)
+        self.restarts += 1
+        fresh = await self._spawn()
+        if self._idle is None:
+            # Stopped while respawning
+            fresh.close()
+            return
+        self._idle.put_nowait(fresh)
+
+    async def run(self, code: str, files: list = None, timeout: float = None) -> dict:
+        """
+        Run a snippet in a warm worker
+
+        Args:
+            code: Python source; the answer is read from its `result` variable
+            files: Paths exposed to the snippet as `files`
+            timeout: Wall-time limit in seconds (defaults to config.CODE_TIMEOUT_SECONDS)
+
+        Returns:
+            {"ok", "result", "stdout", "error", "duration_ms"}
+        """
+        if not self.started:
+            await self.start()
+        timeout = timeout or self.timeout
+        loop = asyncio.get_running_loop()
+        worker = await self._idle.get()
+        self.runs += 1
+        start = time.perf_counter()
+        healthy = True
+        try:
+            inputs, staged = worker.stage(files or [])
+        except OSError:
+            self._idle.put_nowait(worker)
+            raise
+        try:
+            worker.send({"code": code, "files": staged, "cpu_seconds": self.cpu_seconds,
+                         "output_chars": config.CODE_OUTPUT_CHARS})
+            raw = await asyncio.wait_for(loop.run_in_executor(None, worker.recv), timeout)
+            if not isinstance(raw, dict):
+                raise ValueError("malformed reply")
+            # The snippet can write to the pipe itself, so take only the expected fields
+            reply = {"ok": raw.get("ok") is True, "result": raw.get("result"),
+                     "stdout": str(raw.get("stdout") or ""), "error": raw.get("error")}
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            healthy = False
+            reply = {"ok": False, "result": None, "stdout": "",
+                     "error": f"timed out after {timeout:.0f}s"}
+        except asyncio.CancelledError:
+            # The caller gave up (e.g. its stage budget ran out) while the snippet may still run
+            self.failures += 1
+            self._respawn(worker)
+            raise
+        except (EOFError, BrokenPipeError, OSError, ValueError):
+            # The worker died, e.g. killed by SIGXCPU at the CPU limit, or sent garbage
+            healthy = False
+            reply = {"ok": False, "result": None, "stdout": "",
+                     "error": "worker exited (CPU or memory limit exceeded)"}
+        finally:
+            shutil.rmtree(inputs, ignore_errors=True)
+
+        duration_ms = (time.perf_counter() - start) * 1000
+        self.total_run_ms += duration_ms
+        reply["duration_ms"] = duration_ms
+        if not reply["ok"]:
+            self.failures += 1
+
+        worker.runs += 1
+        if healthy and worker.runs < self.max_runs:
+            self._idle.put_nowait(worker)
+        else:
+            self._respawn(worker)
+        return reply
+
+    def _respawn(self, worker: CodeWorker):
+        """Replace a worker in the background so the caller does not wait for the imports"""
+        task = asyncio.create_task(self._replace(worker))
+        self._respawns.add(task)
+        task.add_done_callback(self._respawns.discard)
+
+    def get_stats(self) -> dict:
+        """Worker pool counters"""
+        return {
+            "workers": self.num_workers,
+            "idle": self._idle.qsize() if self._idle else 0,
+            "runs": self.runs,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "restarts": self.restarts,
+            "avg_run_ms": self.total_run_ms / self.runs if self.runs else 0.0,
+        }
@@ -0,0 +1,91 @@
+"""
+Sandboxed worker for LLM-written analysis code, started by code_runner.CodeRunner
+
+Run as `python -I code_worker.py <fd> <memory_mb>` under the sandbox user,
+in its own network namespace and with a scrubbed environment. It must not
+import config (which loads .env) or anything else that could bring
+credentials into the process. Messages on the pipe are JSON, never pickle,
+so a snippet cannot make the parent run code by crafting a reply.
+"""
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import traceback
+from multiprocessing.connection import Connection
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; limits are then wall-time only
+    resource = None
+
+def _to_jsonable(value):
+    """Convert pandas/numpy results into plain JSON-friendly values"""
+    if hasattr(value, "to_dict") and hasattr(value, "columns"):
+        return value.to_dict(orient="records")
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    if hasattr(value, "item"):
+        return value.item()
+    return value
+
+def _send(conn: Connection, message: dict):
+    conn.send_bytes(json.dumps(message, default=str).encode())
+
+def main(fd: int, memory_mb: int):
+    """Import the analysis stack once, then run snippets until told to stop"""
+    conn = Connection(fd)
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import numpy as np
+    import pandas as pd
+
+    if resource is not None and memory_mb:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    _send(conn, {"ready": True})
+
+    while True:
+        try:
+            job = json.loads(conn.recv_bytes())
+        except EOFError:
+            return
+        if job is None:
+            return
+
+        if resource is not None and job["cpu_seconds"]:
+            # RLIMIT_CPU counts the whole process lifetime, so extend it from current usage
+            used = resource.getrusage(resource.RUSAGE_SELF)
+            soft = int(used.ru_utime + used.ru_stime) + job["cpu_seconds"]
+            hard = resource.getrlimit(resource.RLIMIT_CPU)[1]
+            resource.setrlimit(resource.RLIMIT_CPU, (soft if hard == resource.RLIM_INFINITY
+                                                     else min(soft, hard), hard))
+
+        stdout = io.StringIO()
+        namespace = {"files": job["files"], "pd": pd, "np": np, "plt": plt, "json": json}
+        reply = {"ok": True, "result": None, "error": None}
+        cwd = os.getcwd()
+        try:
+            # TMPDIR is the worker's private home, the only place it can write
+            with tempfile.TemporaryDirectory() as workdir, contextlib.redirect_stdout(stdout):
+                os.chdir(workdir)
+                exec(compile(job["code"], "<llm-code>", "exec"), namespace)
+            reply["result"] = _to_jsonable(namespace.get("result"))
+            json.dumps(reply["result"])
+        except MemoryError:
+            reply.update(ok=False, result=None, error="MemoryError: memory limit exceeded")
+        except Exception:
+            reply.update(ok=False, result=None, error=traceback.format_exc(limit=3))
+        finally:
+            os.chdir(cwd)
+            plt.close("all")
+        reply["stdout"] = stdout.getvalue()[-job["output_chars"]:]
+        _send(conn, reply)
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]), int(sys.argv[2]))
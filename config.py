@@ -17,15 +17,123 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 IITM_AI_TOKEN = os.getenv("IITM_AI_TOKEN", "")
 IITM_API_BASE_URL = os.getenv("IITM_API_BASE_URL", "https://llm.iitm.ac.in/v1")
 MODEL = os.getenv("MODEL", "gpt-4-turbo-preview")
+# Ask for a single JSON {"reasoning", "answer", "answer_type"} response instead of solve + extract calls
+LLM_STRUCTURED_OUTPUT = os.getenv("LLM_STRUCTURED_OUTPUT", "true").lower() == "true"
+# Stream completions and stop as soon as the <final_answer> block closes
+LLM_STREAMING = os.getenv("LLM_STREAMING", "false").lower() == "true"
+# Answers parsed locally from a response with at least this confidence skip the extraction call
+ANSWER_CONFIDENCE_THRESHOLD = float(os.getenv("ANSWER_CONFIDENCE_THRESHOLD", "0.8"))
+# Let the model answer table questions with a query plan that is run locally on the full data
+LOCAL_QUERY_ENGINE = os.getenv("LOCAL_QUERY_ENGINE", "true").lower() == "true"
+# LLM quota per provider, shared by all concurrent chains and all of the provider's models
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "500"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "150000"))
+# Retries for 429, 5xx and connection errors from the LLM provider
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_SECONDS = float(os.getenv("LLM_BACKOFF_SECONDS", "1"))
+# Extra solve models to route between, comma-separated (MODEL is always included)
+LLM_MODELS = os.getenv("LLM_MODELS", "")
+# Cheap, fast model for answer extraction calls (empty sends them to the solve models)
+LLM_EXTRACTION_MODEL = os.getenv("LLM_EXTRACTION_MODEL", "gpt-4o-mini")
+# Send a duplicate to a second backend when the first runs past its p95 latency
+LLM_HEDGING = os.getenv("LLM_HEDGING", "true").lower() == "true"
+LLM_HEDGE_MIN_SECONDS = float(os.getenv("LLM_HEDGE_MIN_SECONDS", "1"))
+LLM_HEDGE_DEFAULT_SECONDS = float(os.getenv("LLM_HEDGE_DEFAULT_SECONDS", "10"))
+LLM_LATENCY_WINDOW = int(os.getenv("LLM_LATENCY_WINDOW", "50"))
+# How long a failing backend is skipped (doubles with each failure in a row)
+LLM_BACKEND_COOLDOWN_SECONDS = float(os.getenv("LLM_BACKEND_COOLDOWN_SECONDS", "15"))
+
+# Token budget for the context sent with each task
+LLM_CONTEXT_TOKEN_BUDGET = int(os.getenv("LLM_CONTEXT_TOKEN_BUDGET", "6000"))
+
+# LLM response cache (temperature-0 calls are cached by default)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "256"))
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
 
 # Quiz solving configuration
 MAX_RETRIES = int(os.getenv("MAX_RETRIES", "3"))
 TIMEOUT_SECONDS = int(os.getenv("TIMEOUT_SECONDS", "180"))
+# Kept back from the chain deadline so the last submission lands in time
+BUDGET_SAFETY_SECONDS = float(os.getenv("BUDGET_SAFETY_SECONDS", "3"))
+
+# Page rendering configuration
+RENDER_READINESS = os.getenv("RENDER_READINESS", "auto")  # auto, result, mutation or sleep
+RENDER_QUIET_MS = int(os.getenv("RENDER_QUIET_MS", "200"))
+
+# Job scheduler configuration
+MAX_CONCURRENT_JOBS = int(os.getenv("MAX_CONCURRENT_JOBS", "4"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "16"))
+JOB_MIN_START_SECONDS = float(os.getenv("JOB_MIN_START_SECONDS", "30"))
+JOB_HISTORY_SIZE = int(os.getenv("JOB_HISTORY_SIZE", "200"))
+
+# Browser pool configuration
+BROWSER_POOL_BROWSERS = int(os.getenv("BROWSER_POOL_BROWSERS", "1"))
+BROWSER_POOL_CONTEXTS = int(os.getenv("BROWSER_POOL_CONTEXTS", "4"))
+BROWSER_POOL_MAX_PAGE_USES = int(os.getenv("BROWSER_POOL_MAX_PAGE_USES", "50"))
+
+# Shared HTTP client (connection pool, DNS cache, keep-alive, retries)
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "100"))
+HTTP_PER_HOST_LIMIT = int(os.getenv("HTTP_PER_HOST_LIMIT", "16"))
+HTTP_DNS_CACHE_SECONDS = int(os.getenv("HTTP_DNS_CACHE_SECONDS", "300"))
+HTTP_KEEPALIVE_SECONDS = float(os.getenv("HTTP_KEEPALIVE_SECONDS", "60"))
+HTTP_TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT_SECONDS", "30"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+HTTP_BACKOFF_SECONDS = float(os.getenv("HTTP_BACKOFF_SECONDS", "0.25"))
+
+# Download configuration
+DOWNLOAD_PER_HOST_LIMIT = int(os.getenv("DOWNLOAD_PER_HOST_LIMIT", "4"))
+DOWNLOAD_CHUNK_SIZE = int(os.getenv("DOWNLOAD_CHUNK_SIZE", str(64 * 1024)))
+DOWNLOAD_TIMEOUT_SECONDS = int(os.getenv("DOWNLOAD_TIMEOUT_SECONDS", "60"))
+DOWNLOAD_CACHE_MAX_BYTES = int(os.getenv("DOWNLOAD_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+
+# CSV format sniffing
+CSV_SNIFF_BYTES = int(os.getenv("CSV_SNIFF_BYTES", str(64 * 1024)))
+
+# Streaming CSV profiling
+PROFILE_CHUNK_ROWS = int(os.getenv("PROFILE_CHUNK_ROWS", "100000"))
+PROFILE_SAMPLE_ROWS = int(os.getenv("PROFILE_SAMPLE_ROWS", "10000"))
+PROFILE_DISTINCT_K = int(os.getenv("PROFILE_DISTINCT_K", "1024"))
+
+# PDF text extraction
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(os.cpu_count() or 2)))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "8"))
+PDF_CACHE_FILES = int(os.getenv("PDF_CACHE_FILES", "32"))
+
+# Pre-warmed workers that run LLM-written analysis code; off by default since the code
+# derives from untrusted pages, and the sandbox needs root with CAP_SYS_ADMIN and unshare
+CODE_EXECUTION_ENABLED = os.getenv("CODE_EXECUTION_ENABLED", "false").lower() == "true"
+# Unprivileged account the code workers run as
+CODE_SANDBOX_USER = os.getenv("CODE_SANDBOX_USER", "nobody")
+CODE_WORKERS = int(os.getenv("CODE_WORKERS", "2"))
+CODE_CPU_SECONDS = int(os.getenv("CODE_CPU_SECONDS", "20"))
+CODE_MEMORY_MB = int(os.getenv("CODE_MEMORY_MB", "2048"))
+CODE_TIMEOUT_SECONDS = float(os.getenv("CODE_TIMEOUT_SECONDS", "30"))
+CODE_WORKER_MAX_RUNS = int(os.getenv("CODE_WORKER_MAX_RUNS", "50"))
+CODE_OUTPUT_CHARS = int(os.getenv("CODE_OUTPUT_CHARS", "4000"))
+
+# Chart rendering
+CHART_WORKERS = int(os.getenv("CHART_WORKERS", "2"))
+CHART_DPI = int(os.getenv("CHART_DPI", "100"))
+CHART_MIN_DPI = int(os.getenv("CHART_MIN_DPI", "40"))
+CHART_PALETTE_COLORS = int(os.getenv("CHART_PALETTE_COLORS", "64"))
+# Budget for the encoded data URI sent as an answer
+CHART_MAX_BYTES = int(os.getenv("CHART_MAX_BYTES", str(1024 * 1024)))
+
+# Page snapshot cache configuration
+PAGE_CACHE_TTL_SECONDS = float(os.getenv("PAGE_CACHE_TTL_SECONDS", "120"))
+PAGE_CACHE_MAX_ENTRIES = int(os.getenv("PAGE_CACHE_MAX_ENTRIES", "32"))
 
 # File paths
 DOWNLOAD_DIR = os.path.join(os.path.dirname(__file__), "downloads")
 TEMP_DIR = os.path.join(os.path.dirname(__file__), "temp")
 
+# Columnar (Arrow IPC) sidecars for downloaded tables
+TABLE_CACHE_DIR = os.path.join(TEMP_DIR, "tables")
+
+# SQLite tier of the LLM response cache (empty string disables it)
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(TEMP_DIR, "llm_cache.sqlite3"))
+
 # Create directories if they don't exist
 os.makedirs(DOWNLOAD_DIR, exist_ok=True)
 os.makedirs(TEMP_DIR, exist_ok=True)
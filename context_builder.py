@@ -0,0 +1,178 @@
+import asyncio
+import json
+import re
+import threading
+import config
+
+try:
+    import tiktoken
+except ImportError:  # Fall back to a character-based estimate
+    tiktoken = None
+
+# Lower rank is kept first when the context has to be cut
+RANK_SCHEMA = 0
+RANK_SAMPLE = 1
+RANK_STATS = 2
+RANK_TEXT = 3
+
+# Headings produced by DataProcessor.get_data_summary
+SUMMARY_RANKS = {
+    "Shape:": RANK_SCHEMA,
+    "Columns:": RANK_SCHEMA,
+    "Data types:": RANK_SCHEMA,
+    "First few rows:": RANK_SAMPLE,
+    "Basic statistics:": RANK_STATS,
+    "Null counts:": RANK_STATS,
+    "Distinct counts": RANK_STATS,
+    "Sampled rows:": RANK_SAMPLE,
+}
+
+# None until loaded, False once loading failed so later calls go straight to the estimate
+_encoding = None
+_encoding_lock = threading.Lock()
+# Background load started by count_tokens on the event loop
+_loading = None
+
+def load_tokenizer():
+    """
+    Load the tokenizer once, blocking the calling thread
+
+    tiktoken downloads its encoding file on first use, so async code runs
+    this through asyncio.to_thread (Runtime.start does at startup).
+    """
+    global _encoding
+    with _encoding_lock:
+        if _encoding is None and tiktoken is not None:
+            try:
+                try:
+                    _encoding = tiktoken.encoding_for_model(config.MODEL)
+                except KeyError:
+                    _encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                # The encoding files are fetched on first use and may be unreachable
+                print(f"Tokenizer unavailable, estimating tokens: {e}")
+                _encoding = False
+    return _encoding
+
+def count_tokens(text: str) -> int:
+    """Count tokens with the local tokenizer, or estimate at ~4 characters per token"""
+    global _loading
+    if _encoding is None and tiktoken is not None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            load_tokenizer()
+        else:
+            if _loading is None:
+                # Estimate until the tokenizer has loaded off the loop
+                _loading = loop.run_in_executor(None, load_tokenizer)
+    if not _encoding:
+        return (len(text) + 3) // 4
+    return len(_encoding.encode(text, disallowed_special=()))
+
+def _normalize(text: str) -> str:
+    """Collapse markup and whitespace so duplicated text compares equal"""
+    return re.sub(r'\s+', ' ', re.sub(r'<[^>]+>', '', text)).strip()
+
+class ContextSection:
+    """One rankable piece of LLM context"""
+
+    def __init__(self, name: str, text: str, rank: int):
+        self.name = name
+        self.text = text
+        self.rank = rank
+        self.tokens = count_tokens(text)
+
+class ContextBuilder:
+    """Assembles LLM context within a token budget, keeping schema and sample rows first"""
+
+    def __init__(self, budget_tokens: int = None):
+        self.budget_tokens = budget_tokens or config.LLM_CONTEXT_TOKEN_BUDGET
+
+    def build(self, task_description: str, context: dict) -> tuple:
+        """
+        Build the context text for a task
+
+        Args:
+            task_description: Task text already sent to the LLM, used to drop duplicates
+            context: Context sections by name (quiz_text, downloaded_files, file_summary_*, ...)
+
+        Returns:
+            (context_text, report) where report lists the tokens used and what was truncated or dropped
+        """
+        report = {"budget": self.budget_tokens, "used": 0, "deduplicated": [],
+                  "truncated": [], "dropped": []}
+        sections = self._split(context)
+
+        # Remove sections that repeat the task description or an earlier section
+        seen = {_normalize(task_description)} if task_description else set()
+        unique = []
+        for section in sections:
+            key = _normalize(section.text)
+            if not key or key in seen or any(key in other for other in seen if len(other) > len(key)):
+                report["deduplicated"].append(section.name)
+                continue
+            seen.add(key)
+            unique.append(section)
+
+        # Spend the budget in rank order, truncating the first section that does not fit
+        remaining = self.budget_tokens
+        kept = {}
+        for section in sorted(unique, key=lambda s: s.rank):
+            if section.tokens <= remaining:
+                kept[id(section)] = section.text
+                remaining -= section.tokens
+            elif remaining > 0:
+                text = self._truncate(section.text, remaining)
+                if text:
+                    kept[id(section)] = text
+                    remaining -= count_tokens(text)
+                    report["truncated"].append(section.name)
+                else:
+                    report["dropped"].append(section.name)
+            else:
+                report["dropped"].append(section.name)
+
+        # Emit in original order so each file's parts stay together
+        parts = [f"[{s.name}]\n{kept[id(s)]}" for s in unique if id(s) in kept]
+        report["used"] = self.budget_tokens - remaining
+        return "\n\n".join(parts), report
+
+    def _split(self, context: dict) -> list:
+        """Turn the context dict into ranked sections"""
+        sections = []
+        for name, value in context.items():
+            if isinstance(value, str):
+                text = value
+            else:
+                text = json.dumps(value, indent=2, default=str)
+
+            if name.startswith("file_summary_") and text.startswith("Shape:"):
+                for block in text.split("\n\n"):
+                    heading = next((h for h in SUMMARY_RANKS if block.startswith(h)), None)
+                    rank = SUMMARY_RANKS.get(heading, RANK_TEXT)
+                    label = heading.rstrip(":").lower() if heading else "notes"
+                    sections.append(ContextSection(f"{name} {label}", block.strip(), rank))
+            elif name == "downloaded_files":
+                sections.append(ContextSection(name, text, RANK_SCHEMA))
+            else:
+                sections.append(ContextSection(name, text, RANK_TEXT))
+        return sections
+
+    def _truncate(self, text: str, max_tokens: int) -> str:
+        """Keep whole leading lines that fit in max_tokens, noting how many were cut"""
+        lines = text.split("\n")
+        kept = []
+        used = 0
+        # Reserve room for the truncation marker
+        limit = max_tokens - 12
+        for line in lines:
+            cost = count_tokens(line) + 1
+            if used + cost > limit:
+                break
+            kept.append(line)
+            used += cost
+        # A heading with nothing under it is not worth sending
+        if not kept or (len(kept) == 1 and len(lines) > 1):
+            return ""
+        return "\n".join(kept) + f"\n... [truncated {len(lines) - len(kept)} more lines]"
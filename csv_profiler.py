@@ -0,0 +1,192 @@
+import numpy as np
+import pandas as pd
+from typing import Optional
+import config
+
+# Hashes are uniform over 64 bits, which the distinct-count estimate relies on
+HASH_SPACE = float(2 ** 64)
+
+class ColumnProfile:
+    """Running statistics for one column, merged chunk by chunk"""
+
+    def __init__(self, distinct_k: int):
+        self.dtype = None
+        self.nulls = 0
+        self.non_null = 0
+        self.numeric = True
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+        self.distinct_k = distinct_k
+        self.min_hashes = np.empty(0, dtype=np.uint64)
+
+    def update(self, series: pd.Series):
+        """Fold one chunk of the column into the profile"""
+        self._merge_dtype(series.dtype)
+        self.nulls += int(series.isna().sum())
+        values = series.dropna()
+        self.non_null += len(values)
+
+        if self.numeric and len(values):
+            self._merge_moments(values.astype(float))
+
+        if len(values):
+            # K-minimum-values sketch for approximate distinct counts
+            hashes = pd.util.hash_pandas_object(values, index=False).to_numpy()
+            self.min_hashes = np.unique(np.concatenate([self.min_hashes, hashes]))[:self.distinct_k]
+
+    def _merge_dtype(self, dtype):
+        """Widen the column dtype the way a full read would"""
+        numeric = pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+        if self.dtype is None:
+            self.dtype = dtype
+            self.numeric = numeric
+        elif dtype != self.dtype:
+            if self.numeric and numeric:
+                self.dtype = np.promote_types(self.dtype, dtype)
+            else:
+                self.dtype = np.dtype(object)
+                self.numeric = False
+
+    def _merge_moments(self, values: pd.Series):
+        """Combine running count/mean/M2 with a chunk (Chan et al. parallel update)"""
+        n_b = len(values)
+        mean_b = float(values.mean())
+        m2_b = float(((values - mean_b) ** 2).sum())
+        n = self.count + n_b
+        delta = mean_b - self.mean
+        self.mean += delta * n_b / n
+        self.m2 += m2_b + delta * delta * self.count * n_b / n
+        self.count = n
+
+        chunk_min, chunk_max = float(values.min()), float(values.max())
+        self.min = chunk_min if self.min is None else min(self.min, chunk_min)
+        self.max = chunk_max if self.max is None else max(self.max, chunk_max)
+
+    @property
+    def std(self) -> float:
+        return (self.m2 / (self.count - 1)) ** 0.5 if self.count > 1 else float("nan")
+
+    @property
+    def exact(self) -> bool:
+        """Whether the sketch never filled, so it holds every distinct value"""
+        return len(self.min_hashes) < self.distinct_k
+
+    @property
+    def distinct(self) -> int:
+        """Exact below the sketch size, estimated above it"""
+        if self.exact:
+            return len(self.min_hashes)
+        # The estimate can overshoot, but there are never more distinct values than values
+        return min(self.non_null, int((self.distinct_k - 1) * HASH_SPACE / float(self.min_hashes[-1])))
+
+class StreamingCSVProfiler:
+    """Builds a get_data_summary-style profile of a CSV in O(chunk) memory"""
+
+    def __init__(self, chunk_rows: int = None, sample_rows: int = None,
+                 distinct_k: int = None, seed: Optional[int] = None):
+        self.chunk_rows = chunk_rows or config.PROFILE_CHUNK_ROWS
+        self.sample_rows = sample_rows or config.PROFILE_SAMPLE_ROWS
+        self.distinct_k = distinct_k or config.PROFILE_DISTINCT_K
+        self.rng = np.random.default_rng(seed)
+
+    def profile(self, csv_path: str, **read_kwargs) -> str:
+        """
+        Profile a CSV file chunk by chunk
+
+        Args:
+            csv_path: Path to CSV file
+            **read_kwargs: Extra arguments for pd.read_csv (encoding, sep, ...)
+
+        Returns:
+            Summary in the DataProcessor.get_data_summary format
+        """
+        return self.profile_chunks(pd.read_csv(csv_path, chunksize=self.chunk_rows, **read_kwargs))
+
+    def profile_chunks(self, chunks) -> str:
+        """Profile any iterable of DataFrame chunks that share the same columns"""
+        columns = None
+        profiles = {}
+        head = None
+        rows = 0
+        reservoir = []
+        reservoir_index = []
+
+        for chunk in chunks:
+            if columns is None:
+                columns = list(chunk.columns)
+                profiles = {col: ColumnProfile(self.distinct_k) for col in columns}
+            if head is None or len(head) < 10:
+                head = chunk.head(10) if head is None else pd.concat([head, chunk.head(10 - len(head))])
+
+            for col in columns:
+                profiles[col].update(chunk[col])
+
+            self._sample(chunk, rows, reservoir, reservoir_index)
+            rows += len(chunk)
+
+        if columns is None:
+            return "Shape: (0, 0)\n\nColumns: []\n"
+
+        dtypes = pd.Series({col: profiles[col].dtype for col in columns}, dtype=object)
+        sample = pd.DataFrame(reservoir, columns=columns, index=reservoir_index).sort_index()
+
+        summary = f"Shape: {(rows, len(columns))}\n\n"
+        summary += f"Columns: {columns}\n\n"
+        summary += f"First few rows:\n{head.to_string()}\n\n"
+        summary += f"Data types:\n{dtypes.to_string()}\n\n"
+        summary += f"Basic statistics:\n{self._statistics(columns, profiles, sample, rows).to_string()}\n\n"
+        summary += f"Null counts:\n{pd.Series({c: profiles[c].nulls for c in columns}).to_string()}\n\n"
+        distinct = pd.Series({c: f"{'' if profiles[c].exact else '~'}{profiles[c].distinct}"
+                              for c in columns})
+        exact = all(profiles[c].exact for c in columns)
+        summary += (f"Distinct counts{'' if exact else ' (~ marks estimates)'}:\n"
+                    f"{distinct.to_string()}\n\n")
+        picks = np.sort(self.rng.choice(len(sample), size=min(10, len(sample)), replace=False))
+        summary += f"Sampled rows:\n{sample.iloc[picks].to_string()}\n"
+        return summary
+
+    def _sample(self, chunk: pd.DataFrame, offset: int, reservoir: list, reservoir_index: list):
+        """Reservoir-sample rows (Algorithm R) so every row is equally likely to be kept"""
+        n = len(chunk)
+        fill = max(0, min(n, self.sample_rows - len(reservoir)))
+        if fill:
+            reservoir.extend(chunk.iloc[:fill].itertuples(index=False, name=None))
+            reservoir_index.extend(range(offset, offset + fill))
+        if fill == n:
+            return
+
+        positions = np.arange(offset + fill, offset + n)
+        slots = (self.rng.random(len(positions)) * (positions + 1)).astype(np.int64)
+        keep = slots < self.sample_rows
+        # Later rows overwrite earlier ones in the same slot, as in the sequential algorithm
+        replacements = dict(zip(slots[keep].tolist(), positions[keep].tolist()))
+        if not replacements:
+            return
+        rows = chunk.iloc[[position - offset for position in replacements.values()]]
+        for slot, position, row in zip(replacements, replacements.values(),
+                                       rows.itertuples(index=False, name=None)):
+            reservoir[slot] = row
+            reservoir_index[slot] = position
+
+    def _statistics(self, columns: list, profiles: dict, sample: pd.DataFrame,
+                    rows: int) -> pd.DataFrame:
+        """describe()-style table: exact moments and extremes, quantiles from the sample"""
+        numeric = [col for col in columns if profiles[col].numeric and profiles[col].count]
+        if not numeric:
+            # Text-only data: top/freq come from the sample, counts from the full pass
+            stats = sample.describe()
+            stats.loc["count"] = [rows - profiles[c].nulls for c in stats.columns]
+            if "unique" in stats.index:
+                stats.loc["unique"] = [profiles[c].distinct for c in stats.columns]
+            return stats
+
+        stats = {}
+        for col in numeric:
+            p = profiles[col]
+            quantiles = pd.to_numeric(sample[col], errors="coerce").quantile([0.25, 0.5, 0.75])
+            stats[col] = [float(p.count), p.mean, p.std, p.min,
+                          quantiles[0.25], quantiles[0.5], quantiles[0.75], p.max]
+        return pd.DataFrame(stats, index=["count", "mean", "std", "min", "25%", "50%", "75%", "max"])
@@ -0,0 +1,75 @@
+import codecs
+import csv
+import config
+
+try:
+    import pyarrow  # noqa: F401 - only needed to enable pandas' pyarrow engine
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+DELIMITERS = ",;\t|"
+
+def detect_encoding(sample: bytes) -> str:
+    """Pick an encoding from a byte sample: BOMs first, then strict UTF-8, then cp1252/latin-1"""
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if sample.startswith(codecs.BOM_UTF16_LE) or sample.startswith(codecs.BOM_UTF16_BE):
+        return "utf-16"
+
+    # Incremental decode tolerates a multi-byte character cut off at the end of the sample
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    try:
+        sample.decode("cp1252")
+        return "cp1252"
+    except UnicodeDecodeError:
+        return "latin-1"
+
+def _looks_numeric(value: str) -> bool:
+    try:
+        float(value.replace(",", ""))
+        return True
+    except ValueError:
+        return False
+
+def sniff_csv(csv_path: str, sample_bytes: int = None) -> dict:
+    """
+    Detect encoding, delimiter and header from the start of a CSV file
+
+    Args:
+        csv_path: Path to CSV file
+        sample_bytes: How much of the file to inspect (defaults to config.CSV_SNIFF_BYTES)
+
+    Returns:
+        Keyword arguments for pd.read_csv: encoding, sep and header
+    """
+    with open(csv_path, 'rb') as f:
+        sample = f.read(sample_bytes or config.CSV_SNIFF_BYTES)
+
+    encoding = detect_encoding(sample)
+    text = sample.decode(encoding, errors="ignore")
+    # Drop the last line, which is probably cut off mid-row
+    if "\n" in text:
+        text = text[:text.rindex("\n")]
+
+    sniffer = csv.Sniffer()
+    try:
+        sep = sniffer.sniff(text, delimiters=DELIMITERS).delimiter
+    except csv.Error:
+        sep = ","
+
+    # Only treat the file as headerless when the first row has numbers and the sniffer agrees
+    header = 0
+    first_row = next(csv.reader([text.split("\n", 1)[0]], delimiter=sep), [])
+    if any(_looks_numeric(field) for field in first_row):
+        try:
+            if not sniffer.has_header(text):
+                header = None
+        except csv.Error:
+            pass
+
+    return {"encoding": encoding, "sep": sep, "header": header}
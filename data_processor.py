@@ -2,60 +2,171 @@ import PyPDF2
 import pandas as pd
 import json
 import os
+import time
 from typing import Any, Union
 from PIL import Image
-import base64
-from io import BytesIO
+import config
+from csv_profiler import StreamingCSVProfiler
+from csv_sniffer import sniff_csv, HAS_PYARROW
+from pdf_extractor import PDFExtractor
+from context_builder import count_tokens
+from table_cache import TableCache
+from chart_renderer import ChartRenderer
 
 class DataProcessor:
     """Handles data processing tasks for various file formats"""
     
-    def extract_text_from_pdf(self, pdf_path: str, page_number: int = None) -> str:
+    def __init__(self):
+        self.parse_metrics = {}
+        self.pdf = PDFExtractor()
+        self.tables = TableCache()
+        self.charts = ChartRenderer()
+        
+    def extract_text_from_pdf(self, pdf_path: str, page_number: int = None,
+                              pages: tuple = None) -> str:
         """
         Extract text from a PDF file
         
         Args:
             pdf_path: Path to PDF file
             page_number: Specific page to extract (1-indexed), or None for all pages
+            pages: 1-indexed inclusive (first, last) range to extract instead of all pages
             
         Returns:
             Extracted text
         """
         try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                
-                if page_number is not None:
-                    # Extract specific page (convert to 0-indexed)
-                    page = pdf_reader.pages[page_number - 1]
-                    return page.extract_text()
-                else:
-                    # Extract all pages
-                    text = ""
-                    for page in pdf_reader.pages:
-                        text += page.extract_text() + "\n\n"
-                    return text
+            if page_number is not None:
+                # Extract specific page
+                return self.pdf.extract_text(pdf_path, (page_number, page_number)).rstrip("\n")
+            return self.pdf.extract_text(pdf_path, pages)
                     
         except Exception as e:
             print(f"Error extracting PDF: {e}")
             return ""
             
-    def read_csv(self, csv_path: str) -> pd.DataFrame:
-        """Read CSV file into pandas DataFrame"""
-        try:
-            return pd.read_csv(csv_path)
-        except Exception as e:
-            print(f"Error reading CSV: {e}")
-            # Try with different encodings
+    def iter_pdf_pages(self, pdf_path: str, pages: tuple = None, ordered: bool = True):
+        """Yield (page_number, text) pairs as they are extracted, so callers can stop early"""
+        return self.pdf.iter_pages(pdf_path, pages, ordered=ordered)
+            
+    def summarize_pdf(self, pdf_path: str, max_tokens: int = None) -> str:
+        """
+        Extract PDF pages in order until a token budget is used up
+        
+        Args:
+            pdf_path: Path to PDF file
+            max_tokens: Token budget for page text (defaults to config.LLM_CONTEXT_TOKEN_BUDGET)
+            
+        Returns:
+            Page count followed by as many whole pages as fit; later pages are only
+            extracted when their range was already in flight (at most one range per worker)
+        """
+        max_tokens = max_tokens or config.LLM_CONTEXT_TOKEN_BUDGET
+        total = self.pdf.page_count(pdf_path)
+        parts = [f"Pages: {total}"]
+        used = 0
+        last = 0
+        for page_number, text in self.iter_pdf_pages(pdf_path):
+            tokens = count_tokens(text)
+            if used + tokens > max_tokens and last:
+                break
+            parts.append(f"Page {page_number}:\n{text}")
+            used += tokens
+            last = page_number
+        if last < total:
+            parts.append(f"[Pages {last + 1}-{total} not extracted]")
+        return "\n\n".join(parts)
+            
+    def read_csv(self, csv_path: str, columns: list = None) -> pd.DataFrame:
+        """Read CSV file into pandas DataFrame, from its columnar sidecar once one exists"""
+        return self.tables.load(csv_path, lambda: self._parse_csv(csv_path), columns)
+            
+    def _parse_csv(self, csv_path: str) -> pd.DataFrame:
+        """Parse a CSV file, sniffing its format so it is parsed once"""
+        options = sniff_csv(csv_path)
+        engines = ["pyarrow", "c"] if HAS_PYARROW else ["c"]
+        
+        for engine in engines:
+            start = time.perf_counter()
             try:
-                return pd.read_csv(csv_path, encoding='latin-1')
-            except:
-                return pd.read_csv(csv_path, encoding='utf-8', errors='ignore')
+                df = pd.read_csv(csv_path, engine=engine, **options)
+                if engine == "pyarrow" and self._has_binary_columns(df):
+                    # pyarrow reads undecodable text as bytes instead of failing
+                    raise UnicodeDecodeError(options["encoding"], b"", 0, 1, "binary column")
+            except UnicodeDecodeError:
+                # Bad bytes beyond the sniffed sample; latin-1 decodes anything
+                options["encoding"] = "latin-1"
+                df = pd.read_csv(csv_path, engine="c", **options)
+                engine = "c"
+            except Exception as e:
+                if engine == engines[-1]:
+                    raise
+                print(f"CSV engine '{engine}' failed ({e}), falling back")
+                continue
+            self._record_parse(engine, (time.perf_counter() - start) * 1000)
+            return df
+            
+    def _has_binary_columns(self, df: pd.DataFrame) -> bool:
+        """Check whether any text column came back as raw bytes"""
+        for col in df.select_dtypes(include="object").columns:
+            first = df[col].first_valid_index()
+            if first is not None and isinstance(df[col][first], bytes):
+                return True
+        return False
+            
+    def _record_parse(self, engine: str, elapsed_ms: float):
+        """Record CSV parse time per engine"""
+        stats = self.parse_metrics.setdefault(engine, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+        stats["count"] += 1
+        stats["total_ms"] += elapsed_ms
+        stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+        print(f"Parsed CSV with '{engine}' engine in {elapsed_ms:.0f} ms")
                 
-    def read_excel(self, excel_path: str, sheet_name: Union[str, int] = 0) -> pd.DataFrame:
-        """Read Excel file into pandas DataFrame"""
+    def profile_csv(self, csv_path: str) -> str:
+        """Summarize a CSV chunk by chunk so memory stays bounded whatever its size"""
+        profiler = StreamingCSVProfiler()
+        start = time.perf_counter()
+        
+        cached = self.tables.iter_chunks(csv_path)
+        if cached is not None:
+            summary = profiler.profile_chunks(cached)
+            self._record_parse("arrow-sidecar", (time.perf_counter() - start) * 1000)
+            return summary
+            
+        options = sniff_csv(csv_path)
+        for attempt in range(2):
+            # Write the columnar sidecar while profiling, so later reads skip parsing
+            writer = self.tables.writer(csv_path)
+            chunks = pd.read_csv(csv_path, chunksize=profiler.chunk_rows, **options)
+            try:
+                summary = profiler.profile_chunks(writer.tee(chunks) if writer else chunks)
+            except UnicodeDecodeError:
+                if writer:
+                    writer.abort()
+                if attempt:
+                    raise
+                options["encoding"] = "latin-1"
+                continue
+            except Exception:
+                if writer:
+                    writer.abort()
+                raise
+            if writer:
+                writer.commit()
+            break
+        self._record_parse("c-chunked", (time.perf_counter() - start) * 1000)
+        return summary
+            
+    def read_excel(self, excel_path: str, sheet_name: Union[str, int] = 0,
+                   columns: list = None) -> pd.DataFrame:
+        """Read Excel file into pandas DataFrame, from its columnar sidecar once one exists"""
         try:
-            return pd.read_excel(excel_path, sheet_name=sheet_name)
+            return self.tables.load(
+                excel_path,
+                lambda: pd.read_excel(excel_path, sheet_name=sheet_name),
+                columns,
+                variant=f"sheet:{sheet_name}"
+            )
         except Exception as e:
             print(f"Error reading Excel: {e}")
             return pd.DataFrame()
@@ -74,9 +185,11 @@ class DataProcessor:
         
         try:
             if ext == '.csv':
-                df = self.read_csv(file_path)
+                return self.profile_csv(file_path)
             elif ext in ['.xlsx', '.xls']:
                 df = self.read_excel(file_path)
+            elif ext == '.pdf':
+                return self.summarize_pdf(file_path)
             elif ext == '.json':
                 with open(file_path, 'r') as f:
                     data = json.load(f)
@@ -96,46 +209,33 @@ class DataProcessor:
         except Exception as e:
             return f"Error processing file: {e}"
             
-    def create_visualization(self, data: pd.DataFrame, chart_type: str = "bar") -> str:
+    def create_visualization(self, data: pd.DataFrame, chart_type: str = "bar",
+                             max_bytes: int = None) -> str:
         """
         Create a visualization and return as base64 encoded string
         
+        Rendering happens in the chart process pool and this call waits for it, so
+        it refuses to run on an event loop; async code uses create_visualization_async.
+        
         Args:
             data: DataFrame to visualize
             chart_type: Type of chart (bar, line, scatter, etc.)
+            max_bytes: Size budget for the data URI (defaults to config.CHART_MAX_BYTES)
             
         Returns:
             Base64 encoded image string with data URI prefix
         """
         try:
-            import matplotlib
-            matplotlib.use('Agg')  # Non-interactive backend
-            import matplotlib.pyplot as plt
-            
-            fig, ax = plt.subplots(figsize=(10, 6))
-            
-            if chart_type == "bar":
-                data.plot(kind='bar', ax=ax)
-            elif chart_type == "line":
-                data.plot(kind='line', ax=ax)
-            elif chart_type == "scatter" and len(data.columns) >= 2:
-                ax.scatter(data.iloc[:, 0], data.iloc[:, 1])
-            else:
-                data.plot(ax=ax)
-                
-            plt.tight_layout()
-            
-            # Save to bytes
-            buffer = BytesIO()
-            plt.savefig(buffer, format='png', dpi=100)
-            buffer.seek(0)
-            
-            # Encode to base64
-            image_base64 = base64.b64encode(buffer.read()).decode()
-            plt.close(fig)
-            
-            return f"data:image/png;base64,{image_base64}"
+            return self.charts.render(data, chart_type, max_bytes)
+        except Exception as e:
+            print(f"Error creating visualization: {e}")
+            return ""
             
+    async def create_visualization_async(self, data: pd.DataFrame, chart_type: str = "bar",
+                                         max_bytes: int = None) -> str:
+        """Async version of create_visualization"""
+        try:
+            return await self.charts.render_async(data, chart_type, max_bytes)
         except Exception as e:
             print(f"Error creating visualization: {e}")
             return ""
@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Optional
+import config
+
+class DownloadCache:
+    """Content-addressed on-disk cache of downloaded files with conditional revalidation"""
+
+    def __init__(self, root: str = None, max_bytes: int = None):
+        self.root = root or config.DOWNLOAD_DIR
+        self.max_bytes = max_bytes or config.DOWNLOAD_CACHE_MAX_BYTES
+        self.objects_dir = os.path.join(self.root, "objects")
+        self.tmp_dir = os.path.join(self.root, "tmp")
+        self.index_path = os.path.join(self.root, "index.json")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        self.index = self._load_index()
+
+        # Metrics
+        self.revalidated = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _load_index(self) -> dict:
+        """Load the URL index, dropping entries whose blob is gone"""
+        try:
+            with open(self.index_path, 'r') as f:
+                index = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+        return {url: entry for url, entry in index.items() if os.path.exists(entry["path"])}
+
+    def _save_index(self):
+        """Persist the URL index atomically"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir, suffix=".json")
+        with os.fdopen(fd, 'w') as f:
+            json.dump(self.index, f)
+        os.replace(tmp_path, self.index_path)
+
+    def lookup(self, url: str) -> Optional[dict]:
+        """Get the cache entry for a URL if its file is still on disk"""
+        entry = self.index.get(url)
+        if entry and os.path.exists(entry["path"]):
+            return entry
+        return None
+
+    def validators(self, url: str) -> dict:
+        """Conditional request headers for revalidating a cached URL"""
+        entry = self.lookup(url)
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def touch(self, url: str) -> str:
+        """Mark a cached URL as fresh (e.g. after a 304) and return its path"""
+        entry = self.index[url]
+        entry["last_access"] = time.time()
+        self.revalidated += 1
+        self._save_index()
+        return entry["path"]
+
+    def temp_path(self, url: str) -> str:
+        """Reserve a temporary file to write a download into before committing it"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir, suffix=self._extension(url))
+        os.close(fd)
+        return tmp_path
+
+    def commit(self, url: str, tmp_path: str, content_hash: str = None,
+               etag: str = None, last_modified: str = None) -> str:
+        """
+        Move a finished download into the content-addressed store
+
+        Args:
+            url: URL the file was downloaded from
+            tmp_path: Temporary file holding the complete download
+            content_hash: SHA-256 of the file, computed here if not given
+            etag: ETag response header, if any
+            last_modified: Last-Modified response header, if any
+
+        Returns:
+            Path of the stored file
+        """
+        content_hash = content_hash or self.hash_file(tmp_path)
+        path = os.path.join(self.objects_dir, content_hash + self._extension(url))
+
+        if os.path.exists(path):
+            os.remove(tmp_path)
+        else:
+            # Atomic on the same filesystem, so readers never see a partial file
+            os.replace(tmp_path, path)
+
+        self.index[url] = {
+            "path": path,
+            "hash": content_hash,
+            "size": os.path.getsize(path),
+            "etag": etag,
+            "last_modified": last_modified,
+            "last_access": time.time(),
+        }
+        self.misses += 1
+        self._evict(keep=path)
+        self._save_index()
+        return path
+
+    def _evict(self, keep: str = None):
+        """Remove least recently used blobs until the cache fits its byte budget"""
+        blobs = {}
+        for entry in self.index.values():
+            blob = blobs.setdefault(entry["path"], {"size": entry["size"], "last_access": 0})
+            blob["last_access"] = max(blob["last_access"], entry["last_access"])
+
+        total = sum(blob["size"] for blob in blobs.values())
+        for path, blob in sorted(blobs.items(), key=lambda item: item[1]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= blob["size"]
+            self.evictions += 1
+            self.index = {url: e for url, e in self.index.items() if e["path"] != path}
+
+    def hash_file(self, path: str) -> str:
+        """SHA-256 of a file on disk"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(config.DOWNLOAD_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _extension(self, url: str) -> str:
+        """Keep the URL's file extension so type detection still works"""
+        return os.path.splitext(url.split('?')[0])[1].lower()[:10]
+
+    def get_stats(self) -> dict:
+        """Get revalidation, miss and eviction counters"""
+        return {
+            "entries": len(self.index),
+            "bytes": sum(e["size"] for e in {e["path"]: e for e in self.index.values()}.values()),
+            "max_bytes": self.max_bytes,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,187 @@
+import asyncio
+import aiohttp
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import time
+from typing import Optional
+from urllib.parse import unquote, urlparse, urlsplit
+import config
+from download_cache import DownloadCache
+from http_client import HTTPClient, get_http_client
+
+class DownloadManager:
+    """Concurrent, streaming file downloader with per-host limits and deduplication"""
+
+    def __init__(self, browser=None, cache: DownloadCache = None, http: HTTPClient = None,
+                 per_host_limit: int = None, chunk_size: int = None):
+        self.browser = browser
+        self.cache = cache or DownloadCache()
+        self.http = http or get_http_client()
+        self.per_host_limit = per_host_limit or config.DOWNLOAD_PER_HOST_LIMIT
+        self.chunk_size = chunk_size or config.DOWNLOAD_CHUNK_SIZE
+        self._host_limits: dict = {}
+        self._by_url: dict = {}
+        # This manager's (i.e. chain's) links to cached files under their own names
+        self._named_dir: Optional[str] = None
+        # url -> file name in _named_dir
+        self._names: dict = {}
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        """Get the concurrency limit for the URL's host"""
+        host = urlparse(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._host_limits[host]
+
+    async def download_all(self, urls: list, timeout: float = None) -> list:
+        """
+        Download several files concurrently
+
+        Args:
+            urls: URLs to download
+            timeout: Seconds each HTTP download may take (defaults to config.DOWNLOAD_TIMEOUT_SECONDS)
+
+        Returns:
+            Paths of the files that downloaded successfully, deduplicated, in URL order
+        """
+        results = await asyncio.gather(*(self.download(url, timeout) for url in urls),
+                                       return_exceptions=True)
+
+        paths = []
+        for url, result in zip(urls, results):
+            if isinstance(result, Exception):
+                print(f"Error downloading {url}: {result}")
+            elif result not in paths:
+                paths.append(result)
+        return paths
+
+    async def download(self, url: str, timeout: float = None) -> str:
+        """
+        Download one file, sharing the result with any concurrent request for the same URL
+
+        Args:
+            url: URL to download from
+            timeout: Seconds the HTTP download may take (defaults to config.DOWNLOAD_TIMEOUT_SECONDS)
+
+        Returns:
+            Path to the file under the URL's file name, linked to the download cache
+        """
+        if url not in self._by_url:
+            self._by_url[url] = asyncio.ensure_future(self._download(url, timeout))
+        try:
+            return await asyncio.shield(self._by_url[url])
+        except Exception:
+            # Let a later call retry a failed URL
+            self._by_url.pop(url, None)
+            raise
+
+    async def _download(self, url: str, timeout: float = None) -> str:
+        """Stream over HTTP, falling back to the browser"""
+        print(f"Downloading file from {url}...")
+        async with self._host_limit(url):
+            try:
+                path = await self._stream(url, timeout)
+            except Exception as e:
+                if not self.browser:
+                    raise
+                print(f"Direct download failed: {e}, trying browser")
+                tmp_path = self.cache.temp_path(url)
+                try:
+                    await self.browser.download_file(url, tmp_path)
+                    path = self.cache.commit(url, tmp_path)
+                except Exception:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                    raise
+        path = self._link_named(url, path)
+        print(f"Downloaded to {path}")
+        return path
+
+    def _link_named(self, url: str, path: str) -> str:
+        """
+        Link a cached file under the URL's own file name
+
+        Cached files are named by content hash, but the question, the file
+        summaries, the query engine's tables and the code runner all refer to
+        files by name (e.g. 'sales.csv'), so the caller gets a path with that name.
+        """
+        if self._named_dir is None:
+            self._named_dir = tempfile.mkdtemp(prefix="files-", dir=self.cache.root)
+        if url not in self._names:
+            name = os.path.basename(unquote(urlsplit(url).path))
+            # As close to the original as the filesystem allows, so it matches the question's wording
+            name = re.sub(r'[\\\x00-\x1f:*?"<>|]+', "_", name).strip(". ") or "download"
+            stem, extension = os.path.splitext(name)
+            taken = set(self._names.values())
+            counter = 2
+            while name in taken:
+                # Same file name from another URL
+                name = f"{stem}_{counter}{extension}"
+                counter += 1
+            self._names[url] = name
+
+        named = os.path.join(self._named_dir, self._names[url])
+        if os.path.exists(named):
+            # A re-download may have new content
+            os.remove(named)
+        try:
+            # A hard link keeps the file even if the cache evicts its blob mid-chain
+            os.link(path, named)
+        except OSError:
+            shutil.copyfile(path, named)
+        return named
+
+    def close(self):
+        """Forget this chain's downloads and remove their named links (the cache keeps the files)"""
+        for future in self._by_url.values():
+            future.cancel()
+        self._by_url.clear()
+        self._names.clear()
+        if self._named_dir is not None:
+            shutil.rmtree(self._named_dir, ignore_errors=True)
+            self._named_dir = None
+
+    async def _stream(self, url: str, timeout: float = None, conditional: bool = True) -> str:
+        """Revalidate the cached copy or stream the response body to disk"""
+        timeout = timeout or config.DOWNLOAD_TIMEOUT_SECONDS
+        async with self.http.request(
+            "GET", url,
+            deadline=time.monotonic() + timeout,
+            headers=self.cache.validators(url) if conditional else {},
+            timeout=aiohttp.ClientTimeout(total=timeout)
+        ) as response:
+            if response.status != 304:
+                return await self._save(url, response)
+            if self.cache.lookup(url):
+                print(f"Not modified, using cached copy of {url}")
+                return self.cache.touch(url)
+            if not conditional:
+                raise ValueError(f"{url} answered 304 to an unconditional request")
+        # The cached copy was evicted after the validators were sent, and a 304 has no body to keep
+        print(f"Not modified, but the cached copy of {url} is gone; downloading again")
+        return await self._stream(url, timeout, conditional=False)
+
+    async def _save(self, url: str, response: aiohttp.ClientResponse) -> str:
+        """Stream a response body into the cache in chunks, hashing as it goes"""
+        response.raise_for_status()
+
+        digest = hashlib.sha256()
+        tmp_path = self.cache.temp_path(url)
+        try:
+            with open(tmp_path, 'wb') as f:
+                async for chunk in response.content.iter_chunked(self.chunk_size):
+                    digest.update(chunk)
+                    f.write(chunk)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+        return self.cache.commit(
+            url, tmp_path,
+            content_hash=digest.hexdigest(),
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified")
+        )
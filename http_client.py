@@ -0,0 +1,203 @@
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+import aiohttp
+import config
+
+# Statuses worth retrying: the server or a proxy in front of it failed transiently
+RETRY_STATUSES = frozenset({500, 502, 503, 504})
+# Methods a server can safely receive twice, so a timed-out attempt may be resent
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+class HTTPClient:
+    """
+    Process-wide pooled aiohttp client
+
+    One keep-alive connection pool with DNS caching and per-host limits is
+    shared by every caller, so repeated requests to the quiz host reuse
+    open TCP/TLS connections. Transient failures (5xx, connection errors,
+    timeouts) are retried with jittered exponential backoff. Non-idempotent
+    methods such as the answer POST only retry failures to connect, since a
+    request that timed out may already have been processed.
+    """
+
+    def __init__(self, pool_size: int = None, per_host_limit: int = None,
+                 retries: int = None, backoff: float = None):
+        self.pool_size = pool_size or config.HTTP_POOL_SIZE
+        self.per_host_limit = per_host_limit or config.HTTP_PER_HOST_LIMIT
+        self.retries = config.HTTP_RETRIES if retries is None else retries
+        self.backoff = backoff or config.HTTP_BACKOFF_SECONDS
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._loop = None
+        # Closes of sessions left behind by an earlier event loop
+        self._closing: set = set()
+
+        # Metrics
+        self.requests = 0
+        self.retried = 0
+        self.failures = 0
+        self.retries_skipped = 0
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.total_request_ms = 0.0
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        """Count new versus reused pooled connections"""
+        trace = aiohttp.TraceConfig()
+
+        async def created(session, ctx, params):
+            self.connections_created += 1
+
+        async def reused(session, ctx, params):
+            self.connections_reused += 1
+
+        trace.on_connection_create_end.append(created)
+        trace.on_connection_reuseconn.append(reused)
+        return trace
+
+    def get_session(self) -> aiohttp.ClientSession:
+        """Get the pooled session, creating it on first use in the running loop"""
+        loop = asyncio.get_running_loop()
+        if self.session is not None and not self.session.closed and self._loop is not loop:
+            self._close_stale(loop)
+        if self.session is None or self.session.closed or self._loop is not loop:
+            # Sessions are bound to a loop; a new loop (e.g. one asyncio.run per request) needs its own
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.pool_size,
+                    limit_per_host=self.per_host_limit,
+                    ttl_dns_cache=config.HTTP_DNS_CACHE_SECONDS,
+                    keepalive_timeout=config.HTTP_KEEPALIVE_SECONDS
+                ),
+                timeout=aiohttp.ClientTimeout(total=config.HTTP_TIMEOUT_SECONDS),
+                trace_configs=[self._trace_config()]
+            )
+            self._loop = loop
+        return self.session
+
+    def _close_stale(self, loop: asyncio.AbstractEventLoop):
+        """Close the session of an earlier event loop before it is replaced"""
+        if self._loop.is_running():
+            # The old loop still serves other callers from its own thread
+            asyncio.run_coroutine_threadsafe(self.session.close(), self._loop)
+            return
+        # Once its loop is closed, the session's sockets can no longer be shut down
+        # cleanly; loop owners should await close_http_client() before closing the loop
+        task = loop.create_task(self.session.close())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def close(self):
+        """Close the pooled session"""
+        if self.session and not self.session.closed:
+            await self.session.close()
+        self.session = None
+        self._loop = None
+
+    def _delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff"""
+        return random.uniform(0, self.backoff * (2 ** attempt))
+
+    def _retry_fits(self, attempt_start: float, delay: float, deadline: Optional[float]) -> bool:
+        """Whether another attempt, expected to cost as much as the last, ends before the deadline"""
+        if deadline is None:
+            return True
+        now = time.monotonic()
+        if now + delay + (now - attempt_start) < deadline:
+            return True
+        self.retries_skipped += 1
+        return False
+
+    @asynccontextmanager
+    async def request(self, method: str, url: str, retries: int = None,
+                      deadline: float = None, retry_unsafe: bool = False, **kwargs):
+        """
+        Send a request through the pool, retrying transient failures
+
+        Retries only happen before the response is handed to the caller,
+        so bodies are never read twice.
+
+        Args:
+            method: HTTP method
+            url: Request URL
+            retries: Retry attempts after the first (defaults to config.HTTP_RETRIES)
+            deadline: time.monotonic() value; no retry is started that would not finish by then
+            retry_unsafe: Retry timeouts and dropped connections for non-idempotent methods
+                too, for endpoints that tolerate receiving the request twice
+            **kwargs: Passed to aiohttp (headers, json, timeout, ...)
+
+        Yields:
+            The aiohttp response
+        """
+        retries = self.retries if retries is None else retries
+        if retry_unsafe or method.upper() in IDEMPOTENT_METHODS:
+            retryable = (aiohttp.ClientConnectionError, asyncio.TimeoutError)
+        else:
+            # The request was never sent, so resending cannot submit it twice
+            retryable = aiohttp.ClientConnectorError
+        session = self.get_session()
+        self.requests += 1
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            attempt_start = time.monotonic()
+            delay = self._delay(attempt)
+            try:
+                response = await session.request(method, url, **kwargs)
+            except retryable as e:
+                if attempt >= retries or not self._retry_fits(attempt_start, delay, deadline):
+                    self.failures += 1
+                    raise
+                print(f"{method} {url} failed ({e!r}), retrying")
+            else:
+                if (response.status not in RETRY_STATUSES or attempt >= retries
+                        or not self._retry_fits(attempt_start, delay, deadline)):
+                    break
+                response.release()
+                print(f"{method} {url} returned {response.status}, retrying")
+            self.retried += 1
+            await asyncio.sleep(delay)
+            attempt += 1
+
+        self.total_request_ms += (time.perf_counter() - start) * 1000
+        try:
+            yield response
+        finally:
+            response.release()
+
+    def get_stats(self) -> dict:
+        """Request, retry and connection pool counters"""
+        connector = self.session.connector if self.session and not self.session.closed else None
+        # aiohttp does not expose pool occupancy publicly
+        in_use = len(getattr(connector, "_acquired", ())) if connector else 0
+        reused = self.connections_reused
+        opened = self.connections_created
+        return {
+            "requests": self.requests,
+            "retries": self.retried,
+            "failures": self.failures,
+            "retries_skipped_for_deadline": self.retries_skipped,
+            "avg_request_ms": self.total_request_ms / self.requests if self.requests else 0.0,
+            "pool_size": self.pool_size,
+            "pool_in_use": in_use,
+            "pool_utilization": in_use / self.pool_size,
+            "connections_created": opened,
+            "connections_reused": reused,
+            "connection_reuse_rate": reused / (opened + reused) if opened + reused else 0.0,
+        }
+
+_client: Optional[HTTPClient] = None
+
+def get_http_client() -> HTTPClient:
+    """Get the process-wide HTTP client"""
+    global _client
+    if _client is None:
+        _client = HTTPClient()
+    return _client
+
+async def close_http_client():
+    """Close the process-wide HTTP client's connections"""
+    if _client is not None:
+        await _client.close()
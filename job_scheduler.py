@@ -0,0 +1,193 @@
+import asyncio
+import itertools
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+import config
+
+class QueueFullError(Exception):
+    """Raised when the scheduler cannot admit another job"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Job queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+class Job:
+    """A queued unit of work with a hard deadline"""
+
+    def __init__(self, factory: Callable[["Job"], Awaitable], priority: int = 0,
+                 budget_seconds: float = None, description: str = ""):
+        self.id = uuid.uuid4().hex
+        self.factory = factory
+        self.priority = priority
+        self.description = description
+        self.created_at = datetime.now()
+        self.deadline = self.created_at + timedelta(
+            seconds=budget_seconds if budget_seconds is not None else config.TIMEOUT_SECONDS
+        )
+        self.status = "queued"
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.error: Optional[str] = None
+
+    def time_remaining(self) -> float:
+        """Seconds left before the job's deadline"""
+        return (self.deadline - datetime.now()).total_seconds()
+
+    def to_dict(self) -> dict:
+        """Serialize the job status for the API"""
+        def fmt(value):
+            return value.isoformat() if value else None
+
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "description": self.description,
+            "priority": self.priority,
+            "created_at": fmt(self.created_at),
+            "started_at": fmt(self.started_at),
+            "finished_at": fmt(self.finished_at),
+            "deadline": fmt(self.deadline),
+            "error": self.error,
+        }
+
+class JobScheduler:
+    """Bounded worker pool with a priority/FIFO queue and admission control"""
+
+    def __init__(self, workers: int = None, max_queue: int = None,
+                 min_start_seconds: float = None, history_size: int = None):
+        self.num_workers = workers or config.MAX_CONCURRENT_JOBS
+        self.max_queue = max_queue or config.JOB_QUEUE_SIZE
+        self.min_start_seconds = (config.JOB_MIN_START_SECONDS
+                                  if min_start_seconds is None else min_start_seconds)
+        self.history_size = history_size or config.JOB_HISTORY_SIZE
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._workers: list = []
+        self._sequence = itertools.count()
+        self.running = 0
+
+        # Metrics
+        self.completed = 0
+        self.failed = 0
+        self.expired = 0
+        self.rejected = 0
+        self.total_run_seconds = 0.0
+
+    def start(self):
+        """Start the worker tasks on the running event loop"""
+        if self._workers:
+            return
+        self._queue = asyncio.PriorityQueue()
+        self._workers = [
+            asyncio.create_task(self._worker(index)) for index in range(self.num_workers)
+        ]
+
+    async def stop(self):
+        """Cancel the workers and any job they are running"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+
+    def retry_after(self) -> int:
+        """Estimate how many seconds until a queue slot frees up"""
+        # A queue slot frees up as soon as any worker finishes its current job
+        finished = self.completed + self.failed
+        avg_run = self.total_run_seconds / finished if finished else config.TIMEOUT_SECONDS / 2
+        return max(1, int(avg_run / self.num_workers))
+
+    def submit(self, factory: Callable[[Job], Awaitable], priority: int = 0,
+               description: str = "") -> Job:
+        """
+        Admit a job into the queue
+
+        Args:
+            factory: Called with the Job when a worker picks it up, returns the coroutine to run
+            priority: Lower values run first; equal priorities run in FIFO order
+            description: Human readable label for the status endpoint
+
+        Returns:
+            The queued Job
+
+        Raises:
+            QueueFullError: If the queue is at capacity
+        """
+        self.start()
+        if self._queue.qsize() >= self.max_queue:
+            self.rejected += 1
+            raise QueueFullError(self.retry_after())
+
+        job = Job(factory, priority=priority, description=description)
+        self.jobs[job.id] = job
+        self._trim_history()
+        self._queue.put_nowait((priority, next(self._sequence), job))
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Look up a job by ID"""
+        return self.jobs.get(job_id)
+
+    def _trim_history(self):
+        """Forget the oldest finished jobs beyond the history size"""
+        excess = len(self.jobs) - self.history_size
+        for job_id in list(self.jobs):
+            if excess <= 0:
+                break
+            if self.jobs[job_id].status not in ("queued", "running"):
+                del self.jobs[job_id]
+                excess -= 1
+
+    async def _worker(self, index: int):
+        """Pull jobs off the queue and run them one at a time"""
+        while True:
+            _, _, job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job):
+        """Run one job, dropping it if its deadline is too close to start"""
+        if job.time_remaining() < self.min_start_seconds:
+            job.status = "expired"
+            job.error = "Deadline would expire before the job could finish"
+            job.finished_at = datetime.now()
+            self.expired += 1
+            print(f"Dropping job {job.id}: only {job.time_remaining():.1f}s left")
+            return
+
+        job.status = "running"
+        job.started_at = datetime.now()
+        self.running += 1
+        try:
+            await job.factory(job)
+            job.status = "completed"
+            self.completed += 1
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+            raise
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            self.failed += 1
+            print(f"Job {job.id} failed: {e}")
+        finally:
+            self.running -= 1
+            job.finished_at = datetime.now()
+            self.total_run_seconds += (job.finished_at - job.started_at).total_seconds()
+
+    def get_stats(self) -> dict:
+        """Get queue depth, worker utilization and outcome counters"""
+        return {
+            "workers": self.num_workers,
+            "running": self.running,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "max_queue": self.max_queue,
+            "completed": self.completed,
+            "failed": self.failed,
+            "expired": self.expired,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,168 @@
+import re
+from html import unescape
+from typing import Optional
+from urllib.parse import urljoin, urlsplit
+
+# Attachments the solver downloads
+FILE_EXTENSIONS = ("pdf", "csv", "xlsx", "xls", "json", "txt", "zip")
+
+# Characters after a submit cue within which the endpoint must appear
+SUBMIT_WINDOW = 200
+
+# One alternation, so the page is scanned once: absolute URLs in text, URL-valued
+# attributes (lower case in the rendered DOM), and submit cues with any relative
+# path directly after them. Every branch starts with one of the leading
+# characters, which lets the regex engine skip ahead to candidate positions
+# instead of trying each branch everywhere. Cues must start a word ('\b' in the
+# lookbehind), so 'host' or 'ghost' are not read as 'post'.
+_TOKENS = re.compile(
+    r"[hsapSP](?:"
+    r"(?P<url>ttps?://[^\s<>\"'{}|\\^`\[\]]+)"
+    r"|(?:ref|rc|ction)\s*=\s*(?P<quote>[\"'])(?P<attr>[^\"'<>]*)(?P=quote)"
+    r"|(?<=\b[pP])(?P<post>(?i:ost\s+(?:your\s+)?answers?\s+to))"
+    r"|(?P<cue>(?<=\b[pP])(?i:ost)\w*|(?<=\b[sS])(?i:ubmit)\w*)"
+    r")(?:(?i:(?<=to|st|it))[:\s]+(?P<rel>/[^\s<>\"'`]*))?"
+)
+# Tags whose URLs are page resources rather than links: (opening tag, where the skip ends)
+_SKIP_TAGS = (("<script", "</script>"), ("<style", "</style>"), ("<link", ">"))
+_FILE = re.compile(r"\.(?:%s)(?:$|[?#&/])" % "|".join(FILE_EXTENSIONS), re.IGNORECASE)
+_SKIP_SCHEMES = ("javascript:", "mailto:", "tel:", "data:", "blob:", "#")
+
+# Link classes
+FILE, SUBMIT, NAVIGATION = "file", "submit", "navigation"
+
+def _base_parts(base_url: Optional[str]) -> Optional[tuple]:
+    """(page URL, scheme, origin, directory) for joining relative links without urljoin"""
+    if not base_url:
+        return None
+    parts = urlsplit(base_url)
+    origin = f"{parts.scheme}://{parts.netloc}"
+    return base_url, parts.scheme, origin, origin + (parts.path[:parts.path.rfind("/") + 1] or "/")
+
+def _resolve(raw: str, base: Optional[tuple]) -> Optional[str]:
+    """Absolute http(s) URL for an attribute value or URL found in text, None for non-links"""
+    url = (unescape(raw) if "&" in raw else raw).strip().rstrip(".,;:!?)")
+    if not url.startswith(("http://", "https://")):
+        if not url or base is None or url.lower().startswith(_SKIP_SCHEMES):
+            return None
+        base_url, scheme, origin, directory = base
+        # Plain '/path' and 'dir/file' links are joined directly; urljoin handles the rest
+        if "./" in url or url.startswith((".", "?")) or ":" in url.split("/", 1)[0]:
+            url = urljoin(base_url, url)
+        elif url.startswith("//"):
+            url = f"{scheme}:{url}"
+        elif url.startswith("/"):
+            url = origin + url
+        else:
+            url = directory + url
+        if not url.startswith(("http://", "https://")):
+            return None
+    return url.split("#", 1)[0] if "#" in url else url
+
+def _segments(html: str):
+    """
+    (start, end) spans of the body's content, leaving out script, style and link tags
+
+    Rendered HTML has lower-case tag names, so plain str.find locates them
+    without another regex pass over the page.
+    """
+    start = html.find("<body")
+    start = 0 if start < 0 else start
+    end = html.rfind("</body>")
+    end = len(html) if end < start else end
+    # Next occurrence of each skipped tag at or after the current position
+    upcoming = [html.find(tag, start, end) for tag, _ in _SKIP_TAGS]
+    pos = start
+    while pos < end:
+        cuts = [(at, i) for i, at in enumerate(upcoming) if at >= 0]
+        if not cuts:
+            yield pos, end
+            return
+        cut, i = min(cuts)
+        if cut > pos:
+            yield pos, cut
+        close = html.find(_SKIP_TAGS[i][1], cut, end)
+        pos = end if close < 0 else close + len(_SKIP_TAGS[i][1])
+        for j, at in enumerate(upcoming):
+            if 0 <= at < pos:
+                upcoming[j] = html.find(_SKIP_TAGS[j][0], pos, end)
+
+def _classify(url: str) -> str:
+    if _FILE.search(url):
+        return FILE
+    return SUBMIT if "submit" in url.lower() else NAVIGATION
+
+def scan_links(html: str, base_url: str = None) -> dict:
+    """
+    Classify every link on a rendered page in one pass
+
+    Links come from href/src/action attributes and from absolute URLs in
+    the body, resolved against the page URL; the head and script, style and
+    link tags are skipped, since their URLs are page resources rather than
+    attachments (e.g. a manifest.json). The submit endpoint is the
+    first URL following 'post your answer to', else one following a
+    'submit'/'POST' cue, else the first URL with 'submit' in it.
+
+    Args:
+        html: Rendered page HTML (or plain page text)
+        base_url: Page URL that relative links are resolved against
+
+    Returns:
+        dict with 'files' (attachment URLs), 'submit' (endpoint URL or None)
+        and 'navigation' (other links), each list in page order without duplicates
+    """
+    # dicts keep first-seen order and drop duplicates
+    files: dict = {}
+    navigation: dict = {}
+    # Submit candidates by strength: 0 = 'post your answer to', 1 = submit/POST cue, 2 = URL text
+    submit = [None, None, None]
+    cue_strength = None
+    cue_end = -1
+    # raw link text -> (resolved URL, class); pages repeat the same links a lot
+    seen: dict = {}
+    base = _base_parts(base_url)
+
+    matches = (match for start, end in _segments(html)
+               for match in _TOKENS.finditer(html, start, end))
+    for match in matches:
+        url_tail, _, attr, post, cue, rel = match.groups()
+        if url_tail is not None:
+            raw = "h" + url_tail
+        elif attr is not None:
+            raw = attr
+        else:
+            # A submit cue
+            cue_strength = 0 if post is not None else 1
+            cue_end = match.end()
+            if rel and submit[cue_strength] is None:
+                submit[cue_strength] = _resolve(rel, base)
+            continue
+
+        resolved = seen.get(raw)
+        if resolved is None:
+            url = _resolve(raw, base)
+            resolved = seen[raw] = (url, _classify(url) if url else None)
+        url, kind = resolved
+        if url is None:
+            continue
+
+        if cue_strength is not None:
+            # A weak cue ('submit the total of data.csv') does not turn an attachment into the endpoint
+            if match.start() - cue_end <= SUBMIT_WINDOW and not (kind == FILE and cue_strength == 1):
+                if submit[cue_strength] is None:
+                    submit[cue_strength] = url
+                cue_strength = None
+                continue
+            cue_strength = None
+
+        if kind == FILE:
+            files[url] = None
+        elif kind == NAVIGATION:
+            navigation[url] = None
+        elif submit[2] is None:
+            submit[2] = url
+
+    endpoint = next((url for url in submit if url), None)
+    files.pop(endpoint, None)
+    navigation.pop(endpoint, None)
+    return {"files": list(files), "submit": endpoint, "navigation": list(navigation)}
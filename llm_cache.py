@@ -0,0 +1,136 @@
+import hashlib
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Optional
+import config
+
+# Request parameters that change the completion and so belong in the key
+SAMPLING_PARAMS = ("temperature", "top_p", "max_tokens", "response_format", "seed",
+                   "presence_penalty", "frequency_penalty", "stop")
+
+def _normalize(content) -> str:
+    """Normalize line endings and trailing whitespace, which never change the answer"""
+    if not isinstance(content, str):
+        return json.dumps(content, sort_keys=True)
+    lines = content.replace("\r\n", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip()
+
+def request_key(params: dict) -> str:
+    """Stable hash of a completion request: model, normalized messages and sampling parameters"""
+    messages = [
+        {"role": m["role"], "content": _normalize(m["content"])}
+        for m in params.get("messages", [])
+    ]
+    key_data = {
+        "model": params.get("model"),
+        "messages": messages,
+        "sampling": {name: params[name] for name in SAMPLING_PARAMS if name in params},
+    }
+    encoded = json.dumps(key_data, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+class MemoryTier:
+    """In-process LRU cache tier"""
+
+    def __init__(self, max_entries: int = None):
+        self.max_entries = max_entries or config.LLM_CACHE_MEMORY_ENTRIES
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: str, entry: dict):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+class SQLiteTier:
+    """Persistent cache tier backed by a SQLite file"""
+
+    def __init__(self, path: str = None, ttl_seconds: float = None):
+        self.path = path or config.LLM_CACHE_PATH
+        self.ttl_seconds = config.LLM_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, content TEXT NOT NULL, tokens INTEGER NOT NULL, "
+            "created_at REAL NOT NULL)"
+        )
+        self.conn.commit()
+
+    def get(self, key: str) -> Optional[dict]:
+        row = self.conn.execute(
+            "SELECT content, tokens, created_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        if time.time() - row[2] > self.ttl_seconds:
+            self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.conn.commit()
+            return None
+        return {"content": row[0], "tokens": row[1]}
+
+    def put(self, key: str, entry: dict):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO responses (key, content, tokens, created_at) VALUES (?, ?, ?, ?)",
+            (key, entry["content"], entry["tokens"], time.time())
+        )
+        self.conn.commit()
+
+class LLMCache:
+    """Tiered cache of chat completion responses keyed by model, messages and sampling parameters"""
+
+    def __init__(self, tiers: list = None):
+        if tiers is None:
+            tiers = [MemoryTier()]
+            if config.LLM_CACHE_PATH:
+                tiers.append(SQLiteTier())
+        self.tiers = tiers
+        self.hits = 0
+        self.misses = 0
+        self.saved_tokens = 0
+
+    def should_cache(self, params: dict, opt_in: bool = None) -> bool:
+        """Temperature-0 calls are cached by default; others only when opted in"""
+        if opt_in is not None:
+            return opt_in
+        return params.get("temperature", 1) == 0 and not params.get("stream")
+
+    def make_key(self, params: dict) -> str:
+        """Build a stable key from the model, normalized messages and sampling parameters"""
+        return request_key(params)
+
+    def get(self, key: str) -> Optional[str]:
+        """Look a key up tier by tier, promoting hits into faster tiers"""
+        for index, tier in enumerate(self.tiers):
+            entry = tier.get(key)
+            if entry is not None:
+                for faster in self.tiers[:index]:
+                    faster.put(key, entry)
+                self.hits += 1
+                self.saved_tokens += entry["tokens"]
+                return entry["content"]
+        self.misses += 1
+        return None
+
+    def put(self, key: str, content: str, tokens: int = 0):
+        """Store a response in every tier"""
+        entry = {"content": content, "tokens": tokens}
+        for tier in self.tiers:
+            tier.put(key, entry)
+
+    def get_stats(self) -> dict:
+        """Get hit/miss and saved-token counters"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "saved_tokens": self.saved_tokens,
+        }
@@ -1,38 +1,89 @@
-from openai import AsyncOpenAI
 import config
+from llm_cache import LLMCache, request_key
+from llm_router import LLMRouter, RETRYABLE_ERRORS, retry_delay
+from answer_extractor import extract_answer
+from context_builder import ContextBuilder
+from code_runner import CodeRunner, CODE_INSTRUCTIONS
+import asyncio
 import json
+import os
 import base64
-from typing import Any, Optional
+import time
+from typing import Any, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    # query_engine needs pandas, which the Vercel deployment does not install
+    from query_engine import QueryEngine
+
+ANSWER_TYPES = ("number", "string", "boolean", "json", "image")
+
+STRUCTURED_OUTPUT_INSTRUCTIONS = """
+Respond with a single JSON object and nothing else, in this shape:
+{"reasoning": "<your step-by-step approach>", "answer": <the final answer>, "answer_type": "<number|string|boolean|json|image>"}
+The "answer" must be the exact value to submit: a JSON number, string, boolean, object/array, or a base64 data URI for images.
+"""
+
+FINAL_ANSWER_OPEN = "<final_answer>"
+FINAL_ANSWER_CLOSE = "</final_answer>"
+
+STREAMING_OUTPUT_INSTRUCTIONS = f"""
+Work through the problem concisely, then give the final answer as a JSON object inside tags:
+{FINAL_ANSWER_OPEN}{{"answer": <the final answer>, "answer_type": "<number|string|boolean|json|image>"}}{FINAL_ANSWER_CLOSE}
+The "answer" must be the exact value to submit. Write nothing after the closing tag.
+"""
 
 class LLMHandler:
     """Handles LLM interactions for solving quiz tasks"""
     
-    def __init__(self):
-        # Initialize client based on provider
-        if config.LLM_PROVIDER == "iitm":
-            # Use IIT Madras AI pipeline
-            self.client = AsyncOpenAI(
-                api_key=config.IITM_AI_TOKEN,
-                base_url=config.IITM_API_BASE_URL
-            )
-        else:
-            # Use OpenAI
-            self.client = AsyncOpenAI(api_key=config.OPENAI_API_KEY)
+    # Identical requests in flight across all handlers, so concurrent chains share one call
+    _inflight: dict = {}
+    
+    def __init__(self, cache: LLMCache = None, router: LLMRouter = None, chain_id: str = None):
+        # Share the process-wide router (clients, latency stats, quotas) when given one
+        self.router = router or LLMRouter()
+        self.chain_id = chain_id
         
         self.model = config.MODEL
         self.provider = config.LLM_PROVIDER
+        self.cache = cache if cache is not None else (LLMCache() if config.LLM_CACHE_ENABLED else None)
+        self.context_builder = ContextBuilder()
+        self.last_context_report = None
         
-    async def solve_task(self, task_description: str, context: dict = None) -> Any:
-        """
-        Use LLM to solve a quiz task
+        # Structured output metrics
+        self.structured_calls = 0
+        self.structured_fallbacks = 0
         
-        Args:
-            task_description: The task instructions from the quiz page
-            context: Additional context (downloaded files, data, etc.)
-            
-        Returns:
-            The answer to the task
-        """
+        # Local query plan metrics
+        self.local_queries = 0
+        self.local_query_failures = 0
+        
+        # Generated code execution metrics
+        self.code_runs = 0
+        self.code_failures = 0
+        self.last_code_run = None
+        
+        # Uncached completion latency, used to decide whether a follow-up call still fits
+        self.completion_calls = 0
+        self.total_completion_ms = 0.0
+        self.skipped_for_time = 0
+        
+        # Answers found without the extraction call
+        self.local_extractions = 0
+        self.extraction_calls = 0
+        
+        # Provider error handling and request coalescing metrics
+        self.llm_retries = 0
+        self.coalesced = 0
+        
+        # Streaming metrics
+        self.streaming_calls = 0
+        self.streaming_early_stops = 0
+        self.total_first_token_ms = 0.0
+        self.total_answer_ms = 0.0
+        
+    def _build_solve_messages(self, task_description: str, context: dict = None,
+                              output_instructions: str = None) -> list:
+        """Build the system and user messages for solving a task"""
         system_prompt = """You are an expert data analyst and problem solver. 
 You will receive a task description that may involve:
 - Data sourcing (scraping, API calls)
@@ -54,38 +105,483 @@ If you need to return a chart/image, describe what visualization to create.
 """
         
         if context:
-            user_message += f"\nAdditional Context:\n{json.dumps(context, indent=2)}\n"
+            context_text, report = self.context_builder.build(task_description, context)
+            self.last_context_report = report
+            if report["truncated"] or report["dropped"]:
+                print(f"Context trimmed to {report['used']}/{report['budget']} tokens; "
+                      f"truncated {report['truncated']}, dropped {report['dropped']}")
+            if context_text:
+                user_message += f"\nAdditional Context:\n{context_text}\n"
             
         user_message += "\nProvide your solution approach and the final answer."
         
+        if output_instructions:
+            system_prompt += output_instructions
+            
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_message}
+        ]
+        
+    async def complete(self, cache: bool = None, kind: str = "solve", **params) -> str:
+        """
+        Run a chat completion, serving it from the response cache when allowed
+        
+        Args:
+            cache: Force caching on or off (default: cache temperature-0 calls only)
+            kind: 'solve', or 'extract' for short calls the router sends to the cheap model
+            **params: Arguments for chat.completions.create
+            
+        Returns:
+            The completion text
+        """
+        # The router picks the model from the kind's tier, so params["model"] (config.MODEL even
+        # for extraction) does not say which model answers; key on the kind and the tier's models
+        keyed = {**params, "model": f"{kind}:{','.join(self.router.tier_models(kind))}"}
+        key = None
+        if self.cache and self.cache.should_cache(params, cache):
+            key = self.cache.make_key(keyed)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+                
+        # Single-flight: join an identical request that is already in flight
+        flight_key = request_key(keyed)
+        shared = LLMHandler._inflight.get(flight_key)
+        if shared is not None and not shared.done() and shared.get_loop() is asyncio.get_running_loop():
+            self.coalesced += 1
+            content, tokens = await asyncio.shield(shared)
+        else:
+            task = asyncio.ensure_future(self._complete_uncached(params, kind))
+            LLMHandler._inflight[flight_key] = task
+            task.add_done_callback(
+                lambda done: LLMHandler._inflight.pop(flight_key, None)
+                if LLMHandler._inflight.get(flight_key) is done else None
+            )
+            content, tokens = await asyncio.shield(task)
+        
+        if key and content is not None:
+            self.cache.put(key, content, tokens=tokens)
+        return content
+        
+    async def _complete_uncached(self, params: dict, kind: str = "solve") -> tuple:
+        """Send one completion request; returns (content, total tokens)"""
+        start = time.perf_counter()
+        response = await self._create(params, kind)
+        content = response.choices[0].message.content
+        self.completion_calls += 1
+        self.total_completion_ms += (time.perf_counter() - start) * 1000
+        
+        tokens = response.usage.total_tokens if response.usage else 0
+        return content, tokens
+        
+    async def _create(self, params: dict, kind: str = "solve"):
+        """
+        Create a completion through the router, retrying 429s, 5xx and connection errors
+        
+        The router already fails over between backends; this retries once
+        every backend has failed. A 'timeout' in params is treated as the
+        deadline for all attempts together: each attempt gets what is left,
+        and no retry starts that would not fit.
+        
+        Args:
+            params: Arguments for chat.completions.create
+            kind: 'solve' or 'extract', which picks the router's backend tier
+            
+        Returns:
+            The parsed response or stream
+        """
+        deadline = time.monotonic() + params["timeout"] if params.get("timeout") else None
+        attempt = 0
+        while True:
+            try:
+                return await self.router.create(params, kind, self.chain_id, deadline)
+            except RETRYABLE_ERRORS as e:
+                delay = retry_delay(e, attempt)
+                if attempt >= config.LLM_MAX_RETRIES or (
+                        deadline is not None and time.monotonic() + delay >= deadline):
+                    raise
+                self.llm_retries += 1
+                print(f"LLM request failed ({type(e).__name__}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                attempt += 1
+                
+
+    def _timeout_params(self, deadline: Optional[float]) -> dict:
+        """Per-request client timeout for the time left before a time.monotonic() deadline"""
+        if deadline is None:
+            return {}
+        return {"timeout": max(0.1, deadline - time.monotonic())}
+        
+    def _can_afford_call(self, deadline: Optional[float]) -> bool:
+        """Whether a typical completion still finishes before the deadline"""
+        if deadline is None or not self.completion_calls:
+            return True
+        expected = self.total_completion_ms / self.completion_calls / 1000
+        remaining = deadline - time.monotonic()
+        if expected < remaining:
+            return True
+        self.skipped_for_time += 1
+        print(f"Skipping follow-up LLM call: ~{expected:.1f}s expected, {remaining:.1f}s left")
+        return False
+        
+    async def solve_task(self, task_description: str, context: dict = None,
+                         cache: bool = None, timeout: float = None) -> Any:
+        """
+        Use LLM to solve a quiz task
+        
+        Args:
+            task_description: The task instructions from the quiz page
+            context: Additional context (downloaded files, data, etc.)
+            cache: Opt in to caching this (non-zero temperature) call
+            timeout: Seconds the request may take
+            
+        Returns:
+            The answer to the task
+        """
+        messages = self._build_solve_messages(task_description, context)
+        
         try:
-            response = await self.client.chat.completions.create(
+            return await self.complete(
+                cache=cache,
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_message}
-                ],
+                messages=messages,
                 temperature=0.1,  # Lower temperature for more deterministic results
-                max_tokens=2000
+                max_tokens=2000,
+                **({"timeout": timeout} if timeout else {})
             )
             
-            return response.choices[0].message.content
-            
         except Exception as e:
             print(f"LLM error: {e}")
             raise
             
-    async def extract_answer_from_response(self, llm_response: str, expected_type: str = "auto") -> Any:
+    async def solve_and_extract(self, task_description: str, context: dict = None,
+                                query_engine: "QueryEngine" = None,
+                                code_runner: CodeRunner = None, timeout: float = None) -> Any:
+        """
+        Solve a task and return just the answer, in one LLM call when possible
+        
+        Uses a single streaming or structured-output call and falls back to
+        the solve_task + extract_answer_from_response pair when the answer
+        cannot be parsed or validated.
+        
+        Args:
+            task_description: The task instructions from the quiz page
+            context: Additional context (downloaded files, data, etc.)
+            query_engine: Runs any query plan in the response against the full tables
+            code_runner: Runs any Python snippet in the response against the downloaded files
+            timeout: Seconds available for the whole solve, including any follow-up calls
+            
+        Returns:
+            The answer to submit
+        """
+        if query_engine is not None and not query_engine.table_names:
+            query_engine = None
+        deadline = time.monotonic() + timeout if timeout else None
+            
+        if config.LLM_STREAMING:
+            return await self.solve_streaming(task_description, context, query_engine, code_runner,
+                                              timeout=timeout)
+            
+        if not config.LLM_STRUCTURED_OUTPUT:
+            llm_response = await self.solve_task(task_description, context, timeout=timeout)
+            print(f"LLM response:\n{llm_response}\n")
+            return await self.extract_answer_from_response(llm_response, deadline=deadline)
+            
+        self.structured_calls += 1
+        instructions = STRUCTURED_OUTPUT_INSTRUCTIONS
+        if query_engine is not None:
+            instructions += query_engine.instructions()
+        if code_runner is not None:
+            instructions += self._code_instructions(context)
+        content = await self.complete(
+            model=self.model,
+            messages=self._build_solve_messages(
+                task_description, context, output_instructions=instructions
+            ),
+            temperature=0.1,
+            max_tokens=2000,
+            response_format={"type": "json_object"},
+            **self._timeout_params(deadline)
+        )
+        print(f"LLM response:\n{content}\n")
+        content = await self._run_answer_code(content, code_runner, context, deadline)
+        
+        try:
+            return self.parse_structured_answer(content, query_engine)
+        except ValueError as e:
+            self.structured_fallbacks += 1
+            print(f"Structured answer invalid ({e}), falling back to extraction "
+                  f"(fallback rate {self.structured_fallbacks}/{self.structured_calls})")
+            return await self.extract_answer_from_response(content, deadline=deadline)
+            
+    async def solve_streaming(self, task_description: str, context: dict = None,
+                              query_engine: "QueryEngine" = None,
+                              code_runner: CodeRunner = None, timeout: float = None) -> Any:
+        """
+        Stream a solution and resolve the answer as soon as the final-answer block closes
+        
+        The rest of the stream is cancelled once the block is complete, so
+        trailing text is never waited for.
+        
+        Args:
+            task_description: The task instructions from the quiz page
+            context: Additional context (downloaded files, data, etc.)
+            query_engine: Runs any query plan in the final answer against the full tables
+            code_runner: Runs any Python snippet in the final answer against the downloaded files
+            timeout: Seconds available for the whole solve, including any follow-up calls
+            
+        Returns:
+            The answer to submit
+        """
+        deadline = time.monotonic() + timeout if timeout else None
+        self.streaming_calls += 1
+        instructions = STREAMING_OUTPUT_INSTRUCTIONS
+        if query_engine is not None:
+            instructions += query_engine.instructions()
+        if code_runner is not None:
+            instructions += self._code_instructions(context)
+        start = time.perf_counter()
+        first_token_ms = None
+        text = ""
+        block = None
+        
+        params = dict(
+            model=self.model,
+            messages=self._build_solve_messages(
+                task_description, context, output_instructions=instructions
+            ),
+            temperature=0.1,
+            max_tokens=2000,
+            stream=True
+        )
+        stream = await self._create({**params, **self._timeout_params(deadline)})
+        
+        try:
+            async for chunk in stream:
+                if not chunk.choices or not chunk.choices[0].delta.content:
+                    continue
+                if first_token_ms is None:
+                    first_token_ms = (time.perf_counter() - start) * 1000
+                    
+                # Only rescan the tail that could contain a newly completed closing tag
+                search_from = max(0, len(text) - len(FINAL_ANSWER_CLOSE))
+                text += chunk.choices[0].delta.content
+                close = text.find(FINAL_ANSWER_CLOSE, search_from)
+                if close != -1:
+                    open_ = text.rfind(FINAL_ANSWER_OPEN, 0, close)
+                    if open_ != -1:
+                        block = text[open_ + len(FINAL_ANSWER_OPEN):close]
+                        self.streaming_early_stops += 1
+                        break
+        finally:
+            # Cancel the remainder of the completion
+            await stream.response.aclose()
+            
+        answer_ms = (time.perf_counter() - start) * 1000
+        self.total_first_token_ms += first_token_ms or answer_ms
+        self.total_answer_ms += answer_ms
+        print(f"LLM stream: first token {first_token_ms or 0:.0f} ms, answer {answer_ms:.0f} ms"
+              f"{' (stopped early)' if block is not None else ''}")
+        print(f"LLM response:\n{text}\n")
+        
+        if block is not None:
+            block = await self._run_answer_code(block.strip().strip("`").removeprefix("json"),
+                                                code_runner, context, deadline)
+            try:
+                return self.parse_structured_answer(block, query_engine)
+            except ValueError as e:
+                print(f"Final answer block invalid ({e}), falling back to extraction")
+        return await self.extract_answer_from_response(text, deadline=deadline)
+            
+    def _code_instructions(self, context: dict = None) -> str:
+        """Prompt text offering code execution over the downloaded files"""
+        files = [os.path.basename(f) for f in (context or {}).get("downloaded_files", [])]
+        return CODE_INSTRUCTIONS.format(files=", ".join(files) or "none")
+        
+    async def _run_answer_code(self, content: str, code_runner: CodeRunner = None,
+                               context: dict = None, deadline: float = None) -> str:
+        """
+        Run the 'code' field of a structured response and put its result in 'answer'
+        
+        Args:
+            content: Structured JSON response
+            code_runner: Worker pool to run the snippet in
+            context: Solve context, for the downloaded file paths
+            deadline: time.monotonic() value the run must finish by
+            
+        Returns:
+            The response JSON, with 'answer' replaced when the code ran successfully
+        """
+        if code_runner is None:
+            return content
+        try:
+            data = json.loads(content)
+        except (TypeError, json.JSONDecodeError):
+            return content
+        if not isinstance(data, dict) or not data.get("code"):
+            return content
+            
+        self.code_runs += 1
+        timeout = None
+        if deadline is not None:
+            timeout = min(code_runner.timeout, max(0.1, deadline - time.monotonic()))
+        run = await code_runner.run(str(data["code"]), (context or {}).get("downloaded_files", []),
+                                    timeout=timeout)
+        self.last_code_run = run
+        if run["stdout"]:
+            print(f"Code output:\n{run['stdout']}")
+        if not run["ok"] or run["result"] is None:
+            self.code_failures += 1
+            print(f"Generated code failed ({run['error'] or 'no result set'}), using the model's answer")
+            return content
+            
+        print(f"Code result ({run['duration_ms']:.0f} ms): {str(run['result'])[:200]}")
+        data["answer"] = run["result"]
+        if isinstance(run["result"], (list, dict)):
+            data["answer_type"] = "json"
+        # The computed result takes precedence over any query plan
+        data.pop("query", None)
+        return json.dumps(data)
+        
+    def parse_structured_answer(self, content: str, query_engine: "QueryEngine" = None) -> Any:
+        """
+        Parse and validate a structured-output response
+        
+        Args:
+            content: JSON object with 'reasoning', 'answer', 'answer_type' and optionally 'query'
+            query_engine: Runs the 'query' plan, whose result replaces the model's own answer
+            
+        Returns:
+            The answer coerced to its declared type
+            
+        Raises:
+            ValueError: If the response is not valid JSON or the answer does not match its type
+        """
+        try:
+            data = json.loads(content)
+        except (TypeError, json.JSONDecodeError) as e:
+            raise ValueError(f"not valid JSON: {e}")
+            
+        if query_engine is not None and isinstance(data, dict) and data.get("query"):
+            self.local_queries += 1
+            try:
+                result = query_engine.execute(data["query"])
+                print(f"Local query result: {result}")
+                data["answer"] = result
+                # Scalars still go through the declared-type checks below
+                if (isinstance(result, (list, dict))
+                        or str(data.get("answer_type", "")).lower() not in ("number", "boolean", "string")):
+                    return result
+            except Exception as e:
+                # Keep the model's own answer when the plan is bad or fails to run
+                self.local_query_failures += 1
+                print(f"Local query failed ({e}), using the model's answer")
+                
+        if not isinstance(data, dict) or "answer" not in data:
+            raise ValueError("missing 'answer' field")
+            
+        answer = data["answer"]
+        answer_type = str(data.get("answer_type", "")).lower()
+        if answer is None:
+            raise ValueError("answer is null")
+            
+        if answer_type == "number":
+            if isinstance(answer, bool):
+                raise ValueError("boolean given for a number answer")
+            if isinstance(answer, str):
+                cleaned = answer.replace(",", "").strip()
+                try:
+                    return int(cleaned) if cleaned.lstrip("-").isdigit() else float(cleaned)
+                except ValueError:
+                    raise ValueError(f"not a number: {answer!r}")
+            if not isinstance(answer, (int, float)):
+                raise ValueError(f"not a number: {answer!r}")
+            return answer
+            
+        if answer_type == "boolean":
+            if isinstance(answer, bool):
+                return answer
+            if str(answer).lower() in ("true", "false"):
+                return str(answer).lower() == "true"
+            raise ValueError(f"not a boolean: {answer!r}")
+            
+        if answer_type == "json":
+            if isinstance(answer, str):
+                try:
+                    return json.loads(answer)
+                except json.JSONDecodeError:
+                    raise ValueError("answer is not valid JSON")
+            return answer
+            
+        if answer_type == "image":
+            if isinstance(answer, str) and answer.startswith("data:image/"):
+                return answer
+            raise ValueError("image answer is not a data URI")
+            
+        if answer_type == "string":
+            if isinstance(answer, (dict, list)):
+                raise ValueError("structured value given for a string answer")
+            return str(answer)
+            
+        raise ValueError(f"unknown answer_type {answer_type!r}, expected one of {ANSWER_TYPES}")
+        
+    def get_stats(self) -> dict:
+        """Get structured-output, streaming and cache counters"""
+        streams = self.streaming_calls
+        stats = {
+            "structured_calls": self.structured_calls,
+            "structured_fallbacks": self.structured_fallbacks,
+            "structured_fallback_rate": (self.structured_fallbacks / self.structured_calls
+                                         if self.structured_calls else 0.0),
+            "streaming_calls": streams,
+            "streaming_early_stops": self.streaming_early_stops,
+            "avg_time_to_first_token_ms": self.total_first_token_ms / streams if streams else 0.0,
+            "avg_time_to_answer_ms": self.total_answer_ms / streams if streams else 0.0,
+            "local_queries": self.local_queries,
+            "local_query_failures": self.local_query_failures,
+            "code_runs": self.code_runs,
+            "code_failures": self.code_failures,
+            "avg_completion_ms": (self.total_completion_ms / self.completion_calls
+                                  if self.completion_calls else 0.0),
+            "skipped_for_time": self.skipped_for_time,
+            "local_extractions": self.local_extractions,
+            "extraction_calls": self.extraction_calls,
+            "llm_retries": self.llm_retries,
+            "coalesced_requests": self.coalesced,
+        }
+        if self.cache:
+            stats["cache"] = self.cache.get_stats()
+        return stats
+            
+    async def extract_answer_from_response(self, llm_response: str, expected_type: str = "auto",
+                                           deadline: float = None) -> Any:
         """
         Extract the actual answer from LLM response
         
+        Parses the response locally first and only asks the LLM when the
+        local extraction is not confident enough and the call still fits
+        before the deadline.
+        
         Args:
             llm_response: Full response from LLM
             expected_type: Expected answer type (number, string, boolean, json, auto)
+            deadline: time.monotonic() value the call must finish by
             
         Returns:
             Extracted answer in appropriate format
         """
+        local = extract_answer(llm_response, expected_type)
+        if local is not None and local["confidence"] >= config.ANSWER_CONFIDENCE_THRESHOLD:
+            self.local_extractions += 1
+            print(f"Extracted answer locally ({local['rule']}, "
+                  f"confidence {local['confidence']:.2f})")
+            return local["value"]
+        if not self._can_afford_call(deadline):
+            # Best local guess beats the raw response
+            return local["value"] if local is not None else llm_response
+            
+        self.extraction_calls += 1
         extraction_prompt = f"""Extract ONLY the final answer from this response.
 Response: {llm_response}
 
@@ -99,38 +595,25 @@ If it's JSON, return valid JSON.
 """
 
         try:
-            response = await self.client.chat.completions.create(
+            answer = await self.complete(
+                kind="extract",
                 model=self.model,
                 messages=[
                     {"role": "user", "content": extraction_prompt}
                 ],
                 temperature=0,
-                max_tokens=500
+                max_tokens=500,
+                **self._timeout_params(deadline)
             )
+            answer = answer.strip()
             
-            answer = response.choices[0].message.content.strip()
-            
-            # Try to parse as appropriate type
-            if expected_type == "number" or expected_type == "auto":
-                try:
-                    # Try int first, then float
-                    if '.' not in answer:
-                        return int(answer)
-                    return float(answer)
-                except ValueError:
-                    pass
-                    
-            if expected_type == "boolean":
+            # Parse the bare value with the same rules (separators, units, quotes, JSON)
+            parsed = extract_answer(answer, expected_type)
+            if parsed is None:
+                return answer
+            if expected_type == "boolean" and parsed["type"] != "boolean":
                 return answer.lower() in ["true", "yes", "1"]
-                
-            if expected_type == "json":
-                try:
-                    return json.loads(answer)
-                except json.JSONDecodeError:
-                    pass
-                    
-            # Return as string if no other type matches
-            return answer
+            return parsed["value"]
             
         except Exception as e:
             print(f"Answer extraction error: {e}")
@@ -153,7 +636,7 @@ Output format: curl -X POST https://tds-llm-analysis.s-anand.net/submit -H "Cont
 Command:"""
 
         try:
-            response = await self.client.chat.completions.create(
+            response = await self.complete(
                 model=self.model,
                 messages=[
                     {"role": "user", "content": prompt}
@@ -162,7 +645,7 @@ Command:"""
                 max_tokens=500
             )
             
-            return response.choices[0].message.content.strip()
+            return response.strip()
             
         except Exception as e:
             print(f"Quiz analysis error: {e}")
@@ -189,7 +672,8 @@ Command:"""
         file_ext = os.path.splitext(file_path)[1].lower()
         
         if file_ext == '.pdf':
-            data_text = processor.extract_text_from_pdf(file_path)
+            # Only extract the pages that fit in the prompt
+            data_text = processor.summarize_pdf(file_path, max_tokens=1250)
         elif file_ext in ['.csv', '.xlsx', '.xls']:
             data_text = processor.get_data_summary(file_path)
         else:
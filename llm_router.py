@@ -0,0 +1,329 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Optional
+from openai import (AsyncOpenAI, APIConnectionError, AuthenticationError, InternalServerError,
+                    NotFoundError, PermissionDeniedError, RateLimitError)
+import config
+from context_builder import count_tokens
+from rate_limiter import RateLimiter
+
+# Provider errors worth retrying after a delay
+RETRYABLE_ERRORS = (RateLimitError, InternalServerError, APIConnectionError)
+# Errors specific to one backend (quota, outage, missing model or key) that another may not have
+FAILOVER_ERRORS = RETRYABLE_ERRORS + (NotFoundError, PermissionDeniedError, AuthenticationError)
+
+# Latency samples a backend needs before its p95 is trusted for hedging
+MIN_HEDGE_SAMPLES = 5
+
+def create_llm_client(provider: str = None) -> AsyncOpenAI:
+    """Build the chat client for a provider (defaults to config.LLM_PROVIDER)"""
+    # Retries are handled by LLMHandler so they respect the rate limiter and deadlines
+    if (provider or config.LLM_PROVIDER) == "iitm":
+        # Use IIT Madras AI pipeline
+        return AsyncOpenAI(
+            api_key=config.IITM_AI_TOKEN,
+            base_url=config.IITM_API_BASE_URL,
+            max_retries=0
+        )
+    # Use OpenAI
+    return AsyncOpenAI(api_key=config.OPENAI_API_KEY, max_retries=0)
+
+def retry_delay(error: Exception, attempt: int) -> float:
+    """The provider's Retry-After when given, otherwise jittered exponential backoff"""
+    response = getattr(error, "response", None)
+    if response is not None:
+        try:
+            return float(response.headers.get("retry-after"))
+        except (TypeError, ValueError):
+            pass
+    return random.uniform(0.5, 1.0) * config.LLM_BACKOFF_SECONDS * (2 ** attempt)
+
+def _split(value: str) -> list:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+def _has_content(response) -> bool:
+    """Whether a completion carries an answer worth returning"""
+    return bool(response.choices and response.choices[0].message.content)
+
+class Backend:
+    """One provider/model pair with its own latency history and health, and its provider's quota"""
+
+    def __init__(self, provider: str, model: str, limiter: RateLimiter = None):
+        self.provider = provider
+        self.model = model
+        self.limiter = limiter
+        # kind -> recent latencies in seconds
+        self.latencies: dict = {}
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.down_until = 0.0
+
+        # Metrics
+        self.requests = 0
+        self.wins = 0
+
+    @property
+    def name(self) -> str:
+        return f"{self.provider}/{self.model}"
+
+    def record(self, kind: str, seconds: float):
+        samples = self.latencies.setdefault(kind, deque(maxlen=config.LLM_LATENCY_WINDOW))
+        samples.append(seconds)
+
+    def percentile(self, kind: str, fraction: float) -> Optional[float]:
+        """Latency percentile over the recent window, None without samples"""
+        samples = sorted(self.latencies.get(kind, ()))
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+    def healthy(self) -> bool:
+        """Not cooling down after failures and not paused by the provider's quota"""
+        now = time.monotonic()
+        paused = self.limiter is not None and self.limiter.paused_until > now
+        return self.down_until <= now and not paused
+
+    def succeeded(self):
+        self.consecutive_failures = 0
+        self.down_until = 0.0
+
+    def failed(self):
+        self.failures += 1
+        self.consecutive_failures += 1
+        # Back off the backend longer the more often it fails in a row
+        cooldown = config.LLM_BACKEND_COOLDOWN_SECONDS * (2 ** (self.consecutive_failures - 1))
+        self.down_until = time.monotonic() + min(cooldown, 300.0)
+
+    def get_stats(self) -> dict:
+        stats = {
+            "requests": self.requests,
+            "wins": self.wins,
+            "failures": self.failures,
+            "healthy": self.healthy(),
+        }
+        for kind in self.latencies:
+            stats[f"{kind}_p50_ms"] = self.percentile(kind, 0.5) * 1000
+            stats[f"{kind}_p95_ms"] = self.percentile(kind, 0.95) * 1000
+        return stats
+
+class LLMRouter:
+    """
+    Routes chat completions across every configured provider and model
+
+    Each request goes to the healthy backend with the lowest recent p50
+    for its kind of call. If it has not answered by that backend's p95, a
+    hedged duplicate goes to the next backend; the first valid answer wins
+    and the other request is cancelled. Extraction calls use the cheap
+    config.LLM_EXTRACTION_MODEL. Backends that fail are cooled down, and
+    their requests fail over to the next backend right away.
+    """
+
+    def __init__(self, rate_limited: bool = False):
+        """
+        Args:
+            rate_limited: Give each provider one RateLimiter, shared by all its backends
+        """
+        providers = [config.LLM_PROVIDER]
+        credentials = {"openai": config.OPENAI_API_KEY, "iitm": config.IITM_AI_TOKEN}
+        providers += [name for name, key in credentials.items() if key and name not in providers]
+        solve_models = list(dict.fromkeys([config.MODEL] + _split(config.LLM_MODELS)))
+        extraction_models = _split(config.LLM_EXTRACTION_MODEL)
+
+        # The configured quota is per provider, so all of a provider's models draw from one limiter
+        self.limiters: dict = {provider: RateLimiter() for provider in providers} if rate_limited else {}
+        self.backends: list = []
+        self.tiers: dict = {"solve": [], "extract": []}
+        for provider in providers:
+            for model in dict.fromkeys(solve_models + extraction_models):
+                backend = Backend(provider, model, self.limiters.get(provider))
+                self.backends.append(backend)
+                if model in solve_models:
+                    self.tiers["solve"].append(backend)
+                if model in extraction_models:
+                    self.tiers["extract"].append(backend)
+        # Without a cheap model, extraction shares the solve backends
+        if not self.tiers["extract"]:
+            self.tiers["extract"] = self.tiers["solve"]
+        self._clients: dict = {}
+
+        # Metrics
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+
+    def client(self, provider: str) -> AsyncOpenAI:
+        """The provider's client, built on first use so the app starts without credentials"""
+        if provider not in self._clients:
+            self._clients[provider] = create_llm_client(provider)
+        return self._clients[provider]
+
+    def tier_models(self, kind: str) -> list:
+        """Models that may answer a request of this kind, in routing order"""
+        tier = self.tiers["solve" if kind == "stream" else kind]
+        return list(dict.fromkeys(backend.model for backend in tier))
+
+    def ranked(self, kind: str) -> list:
+        """The kind's backends, healthy ones first, fastest p50 first (untried count as fastest)"""
+        tier = self.tiers["solve" if kind == "stream" else kind]
+        return sorted(tier, key=lambda backend: (not backend.healthy(),
+                                                 backend.percentile(kind, 0.5) or 0.0))
+
+    def hedge_delay(self, backend: Backend, kind: str) -> float:
+        """How long to wait on a backend before sending a duplicate elsewhere"""
+        samples = backend.latencies.get(kind, ())
+        if len(samples) < MIN_HEDGE_SAMPLES:
+            return config.LLM_HEDGE_DEFAULT_SECONDS
+        return max(config.LLM_HEDGE_MIN_SECONDS, backend.percentile(kind, 0.95))
+
+    async def create(self, params: dict, kind: str = "solve", chain_id: str = None,
+                     deadline: float = None):
+        """
+        Send a completion to the best backend, hedging and failing over as needed
+
+        Streams are not hedged, since a stream has not produced an answer
+        when it opens; they still fail over when a backend errors.
+
+        Args:
+            params: Arguments for chat.completions.create ('model' is set per backend)
+            kind: 'solve' or 'extract', which picks the backend tier
+            chain_id: Chain the call belongs to, for rate limiter fairness
+            deadline: time.monotonic() value all attempts must finish by
+
+        Returns:
+            The parsed response, or the stream when params has stream=True
+
+        Raises:
+            The last backend's error when every backend failed
+        """
+        stream = bool(params.get("stream"))
+        kind = "stream" if stream else kind
+        candidates = self.ranked(kind)
+        pending: dict = {}
+        tried = 0
+        hedge = None
+        error = None
+        invalid = None
+
+        def launch():
+            nonlocal tried
+            backend = candidates[tried]
+            tried += 1
+            task = asyncio.ensure_future(self._send(backend, params, kind, chain_id, deadline))
+            pending[task] = backend
+            return task
+
+        launch()
+        try:
+            while pending:
+                timeout = None
+                if config.LLM_HEDGING and not stream and hedge is None and tried < len(candidates):
+                    timeout = self.hedge_delay(candidates[tried - 1], kind)
+                    if deadline is not None and time.monotonic() + timeout >= deadline:
+                        # A duplicate sent that late could not finish either
+                        timeout = None
+                done, _ = await asyncio.wait(pending, timeout=timeout,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # Past the primary's p95: race a duplicate on the next backend
+                    self.hedges += 1
+                    print(f"LLM request slow on {candidates[tried - 1].name}, "
+                          f"hedging to {candidates[tried].name}")
+                    hedge = launch()
+                    continue
+
+                for task in done:
+                    backend = pending.pop(task)
+                    if task.exception() is not None:
+                        error = task.exception()
+                    elif stream or _has_content(task.result()):
+                        backend.wins += 1
+                        if task is hedge:
+                            self.hedge_wins += 1
+                        return task.result()
+                    else:
+                        invalid = task.result()
+                if pending:
+                    continue
+                if error is not None and not isinstance(error, FAILOVER_ERRORS):
+                    # A bad request would fail on every backend
+                    raise error
+                if tried < len(candidates):
+                    self.failovers += 1
+                    reason = type(error).__name__ if error is not None else "empty answer"
+                    print(f"LLM backend failed ({reason}), "
+                          f"failing over to {candidates[tried].name}")
+                    launch()
+            if invalid is not None:
+                return invalid
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _send(self, backend: Backend, params: dict, kind: str,
+                    chain_id: str = None, deadline: float = None):
+        """Send the request to one backend under its quota, recording latency and health"""
+        reserved = 0
+        if backend.limiter is not None:
+            messages = params.get("messages", [])
+            reserved = (sum(count_tokens(str(m.get("content", ""))) for m in messages)
+                        + params.get("max_tokens", 0))
+            await backend.limiter.acquire(chain_id, reserved)
+
+        request = {**params, "model": backend.model}
+        if deadline is not None:
+            request["timeout"] = max(0.1, deadline - time.monotonic())
+        backend.requests += 1
+        start = time.monotonic()
+        try:
+            raw = await self.client(backend.provider).chat.completions.with_raw_response.create(
+                **request
+            )
+        except asyncio.CancelledError:
+            # Lost a hedge race; the backend took at least this long
+            backend.record(kind, time.monotonic() - start)
+            if backend.limiter is not None:
+                # The prompt was sent, but the completion allowance goes unused
+                backend.limiter.settle(reserved, reserved - params.get("max_tokens", 0))
+            raise
+        except FAILOVER_ERRORS as e:
+            if backend.limiter is not None:
+                backend.limiter.refund(reserved)
+            if isinstance(e, RateLimitError):
+                if backend.limiter is not None:
+                    # Hold back every chain's calls to this provider, not just this request
+                    backend.limiter.backoff(retry_delay(e, 0))
+            else:
+                backend.failed()
+            raise
+
+        backend.record(kind, time.monotonic() - start)
+        backend.succeeded()
+        if backend.limiter is not None and backend.model == config.MODEL:
+            # Each model reports its own quota in the headers; the provider's shared
+            # buckets follow the main model's rather than flipping between models
+            backend.limiter.observe(raw.headers)
+        response = raw.parse()
+        if backend.limiter is not None and not params.get("stream") and response.usage:
+            backend.limiter.settle(reserved, response.usage.total_tokens)
+        return response
+
+    async def close(self):
+        """Stop the rate limiters and close the provider clients"""
+        for limiter in self.limiters.values():
+            await limiter.close()
+        for client in self._clients.values():
+            await client.close()
+        self._clients.clear()
+
+    def get_stats(self) -> dict:
+        """Hedging and failover counters plus per-backend latency and health"""
+        return {
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "failovers": self.failovers,
+            "backends": {backend.name: backend.get_stats() for backend in self.backends},
+            "rate_limiters": {provider: limiter.get_stats() for provider, limiter in self.limiters.items()},
+        }
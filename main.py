@@ -1,12 +1,15 @@
 from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 import uvicorn
 import asyncio
 from typing import Optional
 import config
-from quiz_solver import QuizSolver
+from job_scheduler import QueueFullError
+from runtime import Runtime
 
 app = FastAPI(title="LLM Analysis Quiz API")
+runtime = Runtime()
 
 class QuizRequest(BaseModel):
     email: str
@@ -16,6 +19,7 @@ class QuizRequest(BaseModel):
 class QuizResponse(BaseModel):
     status: str
     message: str
+    job_id: Optional[str] = None
 
 @app.post("/quiz", response_model=QuizResponse)
 async def handle_quiz(request: QuizRequest):
@@ -30,15 +34,46 @@ async def handle_quiz(request: QuizRequest):
     if request.secret != config.SECRET:
         raise HTTPException(status_code=403, detail="Invalid secret")
     
-    # Start quiz solving in background
-    solver = QuizSolver()
-    asyncio.create_task(solver.solve_quiz_chain(request.url, request.email, request.secret))
+    # Queue quiz solving; the job's deadline starts now
+    def run_chain(job):
+        solver = runtime.new_solver(chain_id=job.id)
+        return solver.solve_quiz_chain(
+            request.url, request.email, request.secret, start_time=job.created_at
+        )
+    
+    try:
+        job = runtime.scheduler.submit(run_chain, description=request.url)
+    except QueueFullError as e:
+        return JSONResponse(
+            status_code=429,
+            content={"status": "rejected", "message": str(e)},
+            headers={"Retry-After": str(e.retry_after)}
+        )
     
     return QuizResponse(
         status="accepted",
-        message=f"Quiz solving started for {request.url}"
+        message=f"Quiz solving started for {request.url}",
+        job_id=job.id
     )
 
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Get the status of a queued or running quiz job"""
+    job = runtime.scheduler.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@app.on_event("startup")
+async def startup():
+    """Start the job workers and shared resources"""
+    await runtime.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop the job workers and release shared resources"""
+    await runtime.stop()
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -49,6 +84,11 @@ async def health():
     """Health check endpoint"""
     return {"status": "healthy"}
 
+@app.get("/stats")
+async def stats():
+    """Runtime metrics for shared resources"""
+    return runtime.get_stats()
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     """Handle unexpected errors"""
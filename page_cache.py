@@ -0,0 +1,57 @@
+import time
+from collections import OrderedDict
+from typing import Optional
+import config
+
+class PageCache:
+    """TTL and size bounded cache of rendered quiz page snapshots, keyed by URL"""
+
+    def __init__(self, ttl_seconds: float = None, max_entries: int = None):
+        self.ttl_seconds = config.PAGE_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.max_entries = config.PAGE_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, url: str) -> Optional[dict]:
+        """
+        Get the cached snapshot for a URL
+
+        Args:
+            url: The quiz page URL
+
+        Returns:
+            dict with 'html', 'text', and 'decoded_content' keys, or None if missing or expired
+        """
+        entry = self._entries.get(url)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        stored_at, snapshot = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            del self._entries[url]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(url)
+        self.hits += 1
+        return snapshot
+
+    def put(self, url: str, snapshot: dict):
+        """Store a rendered page snapshot, evicting the least recently used entries"""
+        self._entries[url] = (time.monotonic(), snapshot)
+        self._entries.move_to_end(url)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, url: str):
+        """Drop the snapshot for a URL so the next fetch re-renders it"""
+        self._entries.pop(url, None)
+
+    def clear(self):
+        """Drop all snapshots"""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
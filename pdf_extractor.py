@@ -0,0 +1,150 @@
+import hashlib
+import itertools
+import multiprocessing
+import os
+import PyPDF2
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Iterator, Optional, Tuple
+import config
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+def _get_executor() -> ProcessPoolExecutor:
+    """Create the shared extraction process pool on first use"""
+    global _executor
+    if _executor is None:
+        # Forking a process with an event loop and open sockets is unsafe; spawn starts clean workers
+        _executor = ProcessPoolExecutor(max_workers=config.PDF_WORKERS,
+                                        mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+def _extract_range(pdf_path: str, page_indexes: list) -> list:
+    """Extract text for some pages of a PDF (runs in a worker process)"""
+    with open(pdf_path, 'rb') as file:
+        reader = PyPDF2.PdfReader(file)
+        return [(index, reader.pages[index].extract_text() or "") for index in page_indexes]
+
+class PDFExtractor:
+    """Page-level PDF text extraction spread across processes, with a per-page cache"""
+
+    def __init__(self, max_cached_files: int = None):
+        self.max_cached_files = max_cached_files or config.PDF_CACHE_FILES
+        # file hash -> {page index: text}
+        self._pages: "OrderedDict[str, dict]" = OrderedDict()
+        # (path, size, mtime) -> file hash
+        self._hashes: dict = {}
+
+    def file_hash(self, pdf_path: str) -> str:
+        """SHA-256 of the file, memoized by path, size and modification time"""
+        stat = os.stat(pdf_path)
+        key = (pdf_path, stat.st_size, stat.st_mtime)
+        if key not in self._hashes:
+            digest = hashlib.sha256()
+            with open(pdf_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(chunk)
+            self._hashes[key] = digest.hexdigest()
+        return self._hashes[key]
+
+    def page_count(self, pdf_path: str) -> int:
+        """Number of pages in the PDF"""
+        with open(pdf_path, 'rb') as file:
+            return len(PyPDF2.PdfReader(file).pages)
+
+    def _cached_pages(self, pdf_path: str) -> dict:
+        """Get (creating if needed) the page cache for a file"""
+        content_hash = self.file_hash(pdf_path)
+        if content_hash not in self._pages:
+            self._pages[content_hash] = {}
+            while len(self._pages) > self.max_cached_files:
+                self._pages.popitem(last=False)
+        self._pages.move_to_end(content_hash)
+        return self._pages[content_hash]
+
+    def _resolve_pages(self, pdf_path: str, pages: Optional[Tuple[int, int]]) -> list:
+        """Turn a 1-indexed inclusive (first, last) range into 0-indexed page indexes"""
+        total = self.page_count(pdf_path)
+        if pages is None:
+            return list(range(total))
+        first, last = pages
+        first = max(1, first)
+        last = total if last is None else min(total, last)
+        return list(range(first - 1, last))
+
+    def iter_pages(self, pdf_path: str, pages: Optional[Tuple[int, int]] = None,
+                   ordered: bool = False) -> Iterator[Tuple[int, str]]:
+        """
+        Yield (page_number, text) as pages finish extracting
+
+        Args:
+            pdf_path: Path to PDF file
+            pages: 1-indexed inclusive (first, last) range, or None for all pages
+            ordered: Yield in page order instead of completion order
+
+        Yields:
+            (1-indexed page number, page text)
+        """
+        cache = self._cached_pages(pdf_path)
+        wanted = self._resolve_pages(pdf_path, pages)
+        missing = [index for index in wanted if index not in cache]
+        # Next position in `wanted` to emit when yielding in page order
+        cursor = 0
+
+        if not ordered:
+            for index in wanted:
+                if index in cache:
+                    yield index + 1, cache[index]
+
+        if len(missing) < config.PDF_PARALLEL_MIN_PAGES:
+            # Not worth the process pool round trip
+            for index in wanted:
+                if index not in cache:
+                    cache.update(_extract_range(pdf_path, [index]))
+                    if not ordered:
+                        yield index + 1, cache[index]
+                if ordered:
+                    yield index + 1, cache[index]
+            return
+
+        # Contiguous page ranges, so in-order callers can start on the first range early
+        size = -(-len(missing) // (config.PDF_WORKERS * 2))
+        groups = [missing[i:i + size] for i in range(0, len(missing), size)]
+        pending = iter(groups)
+        running = set()
+        try:
+            while True:
+                # One range per worker in flight; later ranges are submitted only as earlier
+                # ones finish, so a caller that stops early leaves the rest unextracted
+                for group in itertools.islice(pending, config.PDF_WORKERS - len(running)):
+                    running.add(_get_executor().submit(_extract_range, pdf_path, group))
+                if not running:
+                    return
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for index, text in future.result():
+                        cache[index] = text
+                        if not ordered:
+                            yield index + 1, text
+                # Emit the contiguous run of pages that is now complete
+                while ordered and cursor < len(wanted) and wanted[cursor] in cache:
+                    yield wanted[cursor] + 1, cache[wanted[cursor]]
+                    cursor += 1
+        finally:
+            # Stop outstanding work if the caller stopped early
+            for future in running:
+                future.cancel()
+
+    def extract_text(self, pdf_path: str, pages: Optional[Tuple[int, int]] = None) -> str:
+        """
+        Extract text from a page range, joined in page order
+
+        Args:
+            pdf_path: Path to PDF file
+            pages: 1-indexed inclusive (first, last) range, or None for all pages
+
+        Returns:
+            Page texts separated by blank lines
+        """
+        texts = [text for _, text in self.iter_pages(pdf_path, pages, ordered=True)]
+        return "\n\n".join(texts) + ("\n\n" if texts else "")
@@ -0,0 +1,173 @@
+import os
+from typing import Any
+import pandas as pd
+
+TABLE_EXTENSIONS = ('.csv', '.xlsx', '.xls')
+
+FILTER_OPERATORS = {
+    "==": lambda s, v: s == v,
+    "!=": lambda s, v: s != v,
+    ">": lambda s, v: s > v,
+    ">=": lambda s, v: s >= v,
+    "<": lambda s, v: s < v,
+    "<=": lambda s, v: s <= v,
+    "in": lambda s, v: s.isin(v if isinstance(v, list) else [v]),
+    "not_in": lambda s, v: ~s.isin(v if isinstance(v, list) else [v]),
+    "contains": lambda s, v: s.astype(str).str.contains(str(v), case=False, regex=False),
+    "is_null": lambda s, v: s.isna(),
+    "not_null": lambda s, v: s.notna(),
+}
+
+AGG_FUNCS = ("sum", "mean", "count", "max", "min", "median", "std", "nunique")
+JOIN_TYPES = ("inner", "left", "right", "outer")
+
+QUERY_PLAN_INSTRUCTIONS = """
+The downloaded tables are available for exact local computation: {tables}.
+When the answer is computed from these tables (sums, counts, filters, averages, ...), also include
+a "query" field so the result is computed on the full data instead of the summary:
+"query": {{"table": "<table name>", "steps": [<step>, ...]}}
+Steps run in order. Supported steps:
+  {{"op": "filter", "column": "<col>", "operator": "==|!=|>|>=|<|<=|in|not_in|contains|is_null|not_null", "value": <value>}}
+  {{"op": "join", "table": "<other table>", "on": "<col>", "how": "inner|left|right|outer"}}
+  {{"op": "group", "by": "<col>", "column": "<col>", "func": "sum|mean|count|max|min|median|std|nunique"}}
+  {{"op": "agg", "column": "<col>", "func": "sum|mean|count|max|min|median|std|nunique"}}
+  {{"op": "sort", "by": "<col>", "ascending": true|false}}
+  {{"op": "limit", "n": <int>}}
+  {{"op": "select", "columns": ["<col>", ...]}}
+Omit "query" when the answer does not come from the tables.
+"""
+
+class QueryPlanError(ValueError):
+    """Raised when a query plan is malformed or refers to unknown tables or columns"""
+
+class QueryEngine:
+    """Validates and runs small LLM-written query plans over downloaded tables"""
+
+    def __init__(self, processor, files: list):
+        self.processor = processor
+        self.paths = {
+            os.path.basename(path): path for path in files
+            if os.path.splitext(path)[1].lower() in TABLE_EXTENSIONS
+        }
+        self._tables: dict = {}
+
+    @property
+    def table_names(self) -> list:
+        return list(self.paths)
+
+    def instructions(self) -> str:
+        """Prompt text describing the tables and the plan format"""
+        return QUERY_PLAN_INSTRUCTIONS.format(tables=", ".join(self.table_names))
+
+    def _table(self, name: str) -> pd.DataFrame:
+        """Load a table by name (full data, via the columnar sidecar cache)"""
+        if name not in self.paths:
+            raise QueryPlanError(f"unknown table {name!r}, expected one of {self.table_names}")
+        if name not in self._tables:
+            path = self.paths[name]
+            if path.lower().endswith('.csv'):
+                self._tables[name] = self.processor.read_csv(path)
+            else:
+                self._tables[name] = self.processor.read_excel(path)
+        return self._tables[name]
+
+    def _require_columns(self, df: pd.DataFrame, *columns):
+        for column in columns:
+            if column not in df.columns:
+                raise QueryPlanError(f"unknown column {column!r}, expected one of {list(df.columns)}")
+
+    def execute(self, plan: dict) -> Any:
+        """
+        Validate and run a query plan on the full tables
+
+        Args:
+            plan: {"table": name, "steps": [...]} as described in QUERY_PLAN_INSTRUCTIONS
+
+        Returns:
+            A scalar for single-value results, otherwise a list of records
+
+        Raises:
+            QueryPlanError: If the plan is invalid
+        """
+        if not isinstance(plan, dict) or not isinstance(plan.get("steps", []), list):
+            raise QueryPlanError("plan must be an object with a 'steps' list")
+
+        result: Any = self._table(plan.get("table") or (self.table_names or [None])[0])
+        for step in plan.get("steps", []):
+            if not isinstance(result, pd.DataFrame):
+                raise QueryPlanError("no steps may follow an 'agg' step")
+            result = self._run_step(result, step)
+        return self._to_answer(result)
+
+    def _run_step(self, df: pd.DataFrame, step: dict) -> Any:
+        """Run one validated step"""
+        op = step.get("op") if isinstance(step, dict) else None
+
+        if op == "filter":
+            operator = step.get("operator", "==")
+            if operator not in FILTER_OPERATORS:
+                raise QueryPlanError(f"unknown filter operator {operator!r}")
+            self._require_columns(df, step.get("column"))
+            column = df[step["column"]]
+            value = step.get("value")
+            if isinstance(value, (int, float)) and not pd.api.types.is_numeric_dtype(column):
+                column = pd.to_numeric(column, errors="coerce")
+            return df[FILTER_OPERATORS[operator](column, value)]
+
+        if op == "join":
+            how = step.get("how", "inner")
+            if how not in JOIN_TYPES:
+                raise QueryPlanError(f"unknown join type {how!r}")
+            other = self._table(step.get("table"))
+            self._require_columns(df, step.get("on"))
+            self._require_columns(other, step.get("on"))
+            return df.merge(other, on=step["on"], how=how)
+
+        if op == "group":
+            func = step.get("func", "sum")
+            if func not in AGG_FUNCS:
+                raise QueryPlanError(f"unknown aggregation {func!r}")
+            self._require_columns(df, step.get("by"), step.get("column"))
+            return self.processor.aggregate_data(df, step["by"], step["column"], func)
+
+        if op == "agg":
+            func = step.get("func", "sum")
+            if func not in AGG_FUNCS:
+                raise QueryPlanError(f"unknown aggregation {func!r}")
+            self._require_columns(df, step.get("column"))
+            return df[step["column"]].agg(func)
+
+        if op == "sort":
+            self._require_columns(df, step.get("by"))
+            return df.sort_values(step["by"], ascending=bool(step.get("ascending", True)))
+
+        if op == "limit":
+            n = step.get("n")
+            if not isinstance(n, int) or n < 0:
+                raise QueryPlanError("limit 'n' must be a non-negative integer")
+            return df.head(n)
+
+        if op == "select":
+            columns = step.get("columns")
+            if not isinstance(columns, list):
+                raise QueryPlanError("select 'columns' must be a list")
+            self._require_columns(df, *columns)
+            return df[columns]
+
+        raise QueryPlanError(f"unknown step {op!r}")
+
+    def _to_answer(self, result: Any) -> Any:
+        """Convert a pandas result into a JSON-friendly answer"""
+        if isinstance(result, pd.DataFrame):
+            if result.shape == (1, 1):
+                result = result.iat[0, 0]
+            elif result.shape[1] == 1:
+                return [self._to_answer(v) for v in result.iloc[:, 0].tolist()]
+            else:
+                return [{k: self._to_answer(v) for k, v in row.items()}
+                        for row in result.to_dict(orient="records")]
+        if hasattr(result, "item"):
+            result = result.item()
+        if isinstance(result, float) and result.is_integer():
+            return int(result)
+        return result
@@ -3,31 +3,50 @@ import aiohttp
 import json
 import re
 import os
+import time
 from datetime import datetime, timedelta
 from typing import Optional, Any
+from urllib.parse import urlsplit
 import config
 from browser_handler import BrowserHandler
 from llm_handler import LLMHandler
 from data_processor import DataProcessor
+from query_engine import QueryEngine
+from page_cache import PageCache
+from download_manager import DownloadManager
+from http_client import get_http_client
+from time_budget import TimeBudget, BudgetExceeded
+from link_scanner import scan_links
 
 class QuizSolver:
     """Main quiz solving orchestrator"""
     
-    def __init__(self):
-        self.browser = BrowserHandler()
-        self.llm = LLMHandler()
-        self.processor = DataProcessor()
+    def __init__(self, browser_pool=None, download_cache=None, llm_cache=None, code_runner=None,
+                 llm_router=None, processor=None, chain_id=None):
+        self.browser = BrowserHandler(pool=browser_pool)
+        self.llm = LLMHandler(cache=llm_cache, router=llm_router, chain_id=chain_id)
+        self.processor = processor or DataProcessor()
+        self.page_cache = PageCache()
+        self.downloads = DownloadManager(browser=self.browser, cache=download_cache)
+        self.code_runner = code_runner
+        # In-flight page renders and speculative warm-ups, keyed by URL
+        self._page_fetches: dict = {}
+        self._prefetches: dict = {}
         self.start_time = None
         self.max_duration = timedelta(seconds=config.TIMEOUT_SECONDS)
+        self.budget: Optional[TimeBudget] = None
         
     def is_time_remaining(self) -> bool:
         """Check if there's still time remaining for the quiz"""
+        if self.budget is not None:
+            return not self.budget.expired()
         if not self.start_time:
             return True
         elapsed = datetime.now() - self.start_time
         return elapsed < self.max_duration
         
-    async def solve_quiz_chain(self, initial_url: str, email: str, secret: str):
+    async def solve_quiz_chain(self, initial_url: str, email: str, secret: str,
+                               start_time: Optional[datetime] = None):
         """
         Solve a chain of quiz questions, following URLs until complete
         
@@ -35,8 +54,12 @@ class QuizSolver:
             initial_url: First quiz URL
             email: Student email
             secret: Student secret
+            start_time: When the 3-minute budget started (defaults to now)
         """
-        self.start_time = datetime.now()
+        self.start_time = start_time or datetime.now()
+        elapsed = (datetime.now() - self.start_time).total_seconds()
+        self.budget = TimeBudget.from_start(time.monotonic() - elapsed)
+        self.page_cache.clear()
         current_url = initial_url
         attempt = 0
         
@@ -49,6 +72,7 @@ class QuizSolver:
                 print(f"Attempt {attempt}: Solving quiz at {current_url}")
                 print(f"Time elapsed: {datetime.now() - self.start_time}")
                 print(f"{'='*60}\n")
+                self.budget.start_hop()
                 
                 try:
                     # Solve the current quiz
@@ -61,14 +85,19 @@ class QuizSolver:
                         print("Could not find submit URL in quiz page")
                         break
                         
-                    result = await self.submit_answer(
+                    result = await self._stage("submit", lambda timeout: self.submit_answer(
                         submit_url=submit_url,
                         email=email,
                         secret=secret,
                         quiz_url=current_url,
-                        answer=answer
-                    )
+                        answer=answer,
+                        timeout=timeout
+                    ))
                     
+                    # Start on whichever page comes next before anything else
+                    if result.get("url"):
+                        self.prefetch(result["url"])
+
                     print(f"Submission result: {result}")
                     
                     # Check if correct and get next URL
@@ -89,14 +118,21 @@ class QuizSolver:
                             print(f"Skipping to next quiz: {next_url}")
                             current_url = next_url
                         else:
-                            # Retry if time permits
-                            if self.is_time_remaining():
+                            # Retry only if another attempt is expected to fit
+                            expected = self.budget.average_hop_seconds() or 0.0
+                            if self.is_time_remaining() and self.budget.allows(expected):
                                 print("Retrying current quiz...")
                                 continue
                             else:
                                 print("Time limit exceeded. Stopping.")
                                 break
                                 
+                except BudgetExceeded as e:
+                    print(f"Out of time: {e}")
+                    if not self.budget.allows(self.budget.min_hop_seconds()):
+                        print("Not enough time left for another attempt. Stopping.")
+                        break
+                        
                 except Exception as e:
                     print(f"Error solving quiz: {e}")
                     import traceback
@@ -105,9 +141,83 @@ class QuizSolver:
                     if not self.is_time_remaining():
                         break
                         
+                finally:
+                    self.budget.end_hop()
+                        
         finally:
+            for task in list(self._prefetches.values()) + list(self._page_fetches.values()):
+                task.cancel()
+            self._prefetches.clear()
+            self._page_fetches.clear()
+            self.downloads.close()
             await self.browser.stop()
             
+    def prefetch(self, url: str):
+        """
+        Speculatively render a quiz page and download its attachments in the background
+        
+        Results land in the page cache and download cache, so a later
+        solve_single_quiz for the URL starts from warm data.
+        
+        Args:
+            url: Quiz page URL that may be visited next
+        """
+        if url in self._prefetches or not self.is_time_remaining():
+            return
+        print(f"Prefetching {url}")
+        self._prefetches[url] = asyncio.ensure_future(self._warm(url))
+        
+    async def _warm(self, url: str):
+        """Render a page and download the files it links to"""
+        try:
+            page_data = await self.fetch_page(url)
+            file_urls = self.page_links(url, page_data)["files"]
+            if file_urls:
+                await self.downloads.download_all(file_urls)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Prefetching is best effort; the real visit fetches again
+            print(f"Prefetch of {url} failed: {e}")
+        finally:
+            self._prefetches.pop(url, None)
+            
+    async def _stage(self, stage: str, func):
+        """Run a pipeline stage under the chain's time budget (unbounded outside a chain)"""
+        if self.budget is None:
+            return await func(None)
+        return await self.budget.run(stage, func)
+        
+    async def fetch_page(self, url: str, timeout: float = None) -> dict:
+        """
+        Fetch a rendered quiz page, reusing the snapshot from this chain if available
+        
+        Args:
+            url: Quiz page URL
+            timeout: Seconds the render may take
+            
+        Returns:
+            dict with 'html', 'text', and 'decoded_content' keys
+        """
+        page_data = self.page_cache.get(url)
+        if page_data is not None:
+            return page_data
+        
+        # Join a render already in flight (e.g. a prefetch) instead of starting another
+        if url not in self._page_fetches:
+            self._page_fetches[url] = asyncio.ensure_future(self._render(url, timeout))
+        try:
+            return await asyncio.shield(self._page_fetches[url])
+        finally:
+            if url in self._page_fetches and self._page_fetches[url].done():
+                del self._page_fetches[url]
+                
+    async def _render(self, url: str, timeout: float = None) -> dict:
+        """Render a page and store the snapshot"""
+        page_data = await self.browser.fetch_quiz_page(url, timeout=timeout)
+        self.page_cache.put(url, page_data)
+        return page_data
+        
     async def solve_single_quiz(self, url: str) -> Any:
         """
         Solve a single quiz question
@@ -119,7 +229,7 @@ class QuizSolver:
             The answer to submit
         """
         # Fetch the quiz page
-        page_data = await self.browser.fetch_quiz_page(url)
+        page_data = await self._stage("render", lambda timeout: self.fetch_page(url, timeout))
         quiz_text = page_data["decoded_content"]
         
         print(f"Quiz content:\n{quiz_text[:500]}...\n")
@@ -128,22 +238,12 @@ class QuizSolver:
         task_description = self.extract_task_description(quiz_text)
         
         # Check if we need to download any files
-        file_urls = self.extract_file_urls(quiz_text)
+        file_urls = self.page_links(url, page_data)["files"]
         downloaded_files = []
-        
-        for file_url in file_urls:
-            try:
-                filename = os.path.basename(file_url.split('?')[0])
-                if not filename:
-                    filename = f"download_{len(downloaded_files)}.dat"
-                    
-                file_path = os.path.join(config.DOWNLOAD_DIR, filename)
-                print(f"Downloading file from {file_url}...")
-                await self.browser.download_file(file_url, file_path)
-                downloaded_files.append(file_path)
-                print(f"Downloaded to {file_path}")
-            except Exception as e:
-                print(f"Error downloading {file_url}: {e}")
+        if file_urls:
+            downloaded_files = await self._stage(
+                "download", lambda timeout: self.downloads.download_all(file_urls, timeout)
+            )
                 
         # Build context for LLM
         context = {
@@ -162,11 +262,11 @@ class QuizSolver:
                     
         # Use LLM to solve the task
         print("Asking LLM to solve the task...")
-        llm_response = await self.llm.solve_task(task_description, context)
-        print(f"LLM response:\n{llm_response}\n")
-        
-        # Extract the final answer
-        answer = await self.llm.extract_answer_from_response(llm_response)
+        query_engine = (QueryEngine(self.processor, downloaded_files)
+                        if config.LOCAL_QUERY_ENGINE else None)
+        answer = await self._stage("solve", lambda timeout: self.llm.solve_and_extract(
+            task_description, context, query_engine, code_runner=self.code_runner, timeout=timeout
+        ))
         print(f"Extracted answer: {answer}")
         
         return answer
@@ -178,24 +278,29 @@ class QuizSolver:
         text = re.sub(r'<[^>]+>', '', quiz_text)
         return text.strip()
         
-    def extract_file_urls(self, quiz_text: str) -> list:
-        """Extract file download URLs from quiz text"""
-        # Look for URLs in href attributes or plain text
-        urls = []
-        
-        # Find href URLs
-        href_pattern = r'href=["\']([^"\']+)["\']'
-        urls.extend(re.findall(href_pattern, quiz_text))
+    def page_links(self, url: str, page_data: dict) -> dict:
+        """
+        Classify a fetched page's links, scanning the rendered HTML only once
         
-        # Find plain URLs
-        url_pattern = r'https?://[^\s<>"{}|\\^`\[\]]+'
-        urls.extend(re.findall(url_pattern, quiz_text))
+        The result is kept on the snapshot, so the page cache serves it
+        to later lookups of the same page.
         
-        # Filter for likely file URLs (not the submit endpoint)
-        file_extensions = ['.pdf', '.csv', '.xlsx', '.xls', '.json', '.txt', '.zip']
-        file_urls = [url for url in urls if any(ext in url.lower() for ext in file_extensions)]
+        Args:
+            url: Page URL, for resolving relative links
+            page_data: Snapshot from fetch_page
+            
+        Returns:
+            dict with 'files', 'submit' and 'navigation' keys (see link_scanner.scan_links)
+        """
+        links = page_data.get("links")
+        if links is None:
+            links = scan_links(page_data.get("html") or page_data["decoded_content"], url)
+            page_data["links"] = links
+        return links
         
-        return list(set(file_urls))  # Remove duplicates
+    def extract_file_urls(self, quiz_text: str, base_url: str = None) -> list:
+        """Extract file download URLs from quiz text or HTML"""
+        return scan_links(quiz_text, base_url)["files"]
         
     async def extract_submit_url(self, quiz_url: str) -> Optional[str]:
         """
@@ -207,34 +312,22 @@ class QuizSolver:
         Returns:
             Submit endpoint URL
         """
-        page_data = await self.browser.fetch_quiz_page(quiz_url)
-        quiz_text = page_data["decoded_content"]
-        
-        # Look for submit URL patterns
-        submit_patterns = [
-            r'Post your answer to (https?://[^\s<>"{}|\\^`\[\]]+)',
-            r'submit[^h]+(https?://[^\s<>"{}|\\^`\[\]]+)',
-            r'POST[^h]+(https?://[^\s<>"{}|\\^`\[\]]+)',
-        ]
-        
-        for pattern in submit_patterns:
-            matches = re.findall(pattern, quiz_text, re.IGNORECASE)
-            if matches:
-                return matches[0].strip()
-                
-        # If no pattern matched, look for any submit-like URL
-        url_pattern = r'https?://[^\s<>"{}|\\^`\[\]]+'
-        all_urls = re.findall(url_pattern, quiz_text)
-        
-        for url in all_urls:
-            if 'submit' in url.lower():
-                return url
+        page_data = await self.fetch_page(quiz_url)
+        # The rendered text first: markup can split a cue ('Post your <b>answer</b> to') or the
+        # endpoint itself ('<span class="origin">https://host</span>/submit'), which read whole as text
+        found = [scan_links(page_data["decoded_content"], quiz_url)["submit"]]
+        if page_data.get("html"):
+            found.append(self.page_links(quiz_url, page_data)["submit"])
+        found = [url for url in found if url]
+        if found:
+            # A bare origin is usually the first half of a split endpoint
+            return next((url for url in found if urlsplit(url).path.strip("/")), found[0])
                 
         print("Warning: Could not find submit URL in quiz page")
         return None
         
     async def submit_answer(self, submit_url: str, email: str, secret: str, 
-                          quiz_url: str, answer: Any) -> dict:
+                          quiz_url: str, answer: Any, timeout: float = None) -> dict:
         """
         Submit an answer to the quiz endpoint
         
@@ -244,6 +337,7 @@ class QuizSolver:
             secret: Student secret
             quiz_url: Original quiz URL
             answer: The answer to submit
+            timeout: Seconds the submission may take, retries included (default 30)
             
         Returns:
             Response from server
@@ -258,19 +352,21 @@ class QuizSolver:
         print(f"Submitting to {submit_url}")
         print(f"Payload: {json.dumps(payload, indent=2)}")
         
+        timeout = timeout or 30
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    submit_url,
-                    json=payload,
-                    headers={"Content-Type": "application/json"},
-                    timeout=aiohttp.ClientTimeout(total=30)
-                ) as response:
-                    status = response.status
-                    result = await response.json()
-                    
-                    print(f"Response status: {status}")
-                    return result
+            async with get_http_client().request(
+                "POST",
+                submit_url,
+                deadline=time.monotonic() + timeout,
+                json=payload,
+                headers={"Content-Type": "application/json"},
+                timeout=aiohttp.ClientTimeout(total=timeout)
+            ) as response:
+                status = response.status
+                result = await response.json()
+                
+                print(f"Response status: {status}")
+                return result
                     
         except Exception as e:
             print(f"Error submitting answer: {e}")
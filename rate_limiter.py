@@ -0,0 +1,215 @@
+import asyncio
+import re
+import time
+from collections import OrderedDict, deque
+from typing import Optional
+import config
+
+class TokenBucket:
+    """Continuously refilling bucket; capacity is the per-minute allowance"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` is available (amounts above capacity wait for a full bucket)"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float):
+        self._refill()
+        self.level -= min(amount, self.capacity)
+
+    def give(self, amount: float):
+        """Return over-reserved units"""
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+    def sync(self, limit: Optional[float], remaining: Optional[float]):
+        """Adopt the provider's reported per-minute limit and never exceed its remaining quota"""
+        self._refill()
+        if limit:
+            self.capacity = float(limit)
+            self.rate = self.capacity / 60.0
+        if remaining is not None:
+            self.level = min(self.level, self.capacity, float(remaining))
+
+def _parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse reset durations like '1s', '6m0s' or '120ms' into seconds"""
+    if not value:
+        return None
+    units = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+    parts = re.findall(r"([\d.]+)(ms|h|m|s)", value)
+    if not parts:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return sum(float(number) * units[unit] for number, unit in parts)
+
+def _header_number(headers, name: str) -> Optional[float]:
+    try:
+        return float(headers.get(name))
+    except (TypeError, ValueError):
+        return None
+
+class RateLimiter:
+    """
+    Requests/min and tokens/min admission for LLM calls, shared by all chains
+
+    Waiting requests are queued per chain and granted round-robin, so one
+    chain with many queued calls cannot starve the others. The buckets adapt
+    to the provider's x-ratelimit-* response headers, and a 429 pauses all
+    admissions until the provider's retry delay has passed.
+    """
+
+    def __init__(self, requests_per_minute: int = None, tokens_per_minute: int = None):
+        self.requests = TokenBucket(requests_per_minute or config.LLM_REQUESTS_PER_MINUTE)
+        self.tokens = TokenBucket(tokens_per_minute or config.LLM_TOKENS_PER_MINUTE)
+        # chain id -> deque of (tokens, future), in round-robin order
+        self._queues: "OrderedDict[str, deque]" = OrderedDict()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._loop = None
+        self.paused_until = 0.0
+
+        # Metrics
+        self.throttled = 0
+        self.quota_updates = 0
+        self.granted = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+
+    def _ensure_dispatcher(self):
+        loop = asyncio.get_running_loop()
+        if self._dispatcher is None or self._dispatcher.done() or self._loop is not loop:
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._dispatcher = asyncio.ensure_future(self._dispatch())
+
+    async def acquire(self, chain_id: str, tokens: int):
+        """
+        Wait for this chain's turn and enough request and token quota
+
+        Args:
+            chain_id: Chain the call belongs to (the unit of fairness)
+            tokens: Estimated tokens for the call (prompt + max completion)
+        """
+        self._ensure_dispatcher()
+        future = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(chain_id or "", deque()).append((tokens, future))
+        self._wakeup.set()
+        start = time.perf_counter()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just as the caller gave up
+                self.refund(tokens)
+            raise
+        wait_ms = (time.perf_counter() - start) * 1000
+        self.granted += 1
+        self.total_wait_ms += wait_ms
+        self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+
+    def settle(self, reserved: int, used: int):
+        """Refund the difference once the real token usage is known"""
+        if used and reserved > used:
+            self.tokens.give(reserved - used)
+
+    def refund(self, reserved: int):
+        """Return the whole reservation of a request that failed before using any tokens"""
+        self.requests.give(1)
+        self.tokens.give(reserved)
+
+    def observe(self, headers):
+        """Update the buckets from the provider's rate limit headers"""
+        if headers is None:
+            return
+        limit_requests = _header_number(headers, "x-ratelimit-limit-requests")
+        limit_tokens = _header_number(headers, "x-ratelimit-limit-tokens")
+        remaining_requests = _header_number(headers, "x-ratelimit-remaining-requests")
+        remaining_tokens = _header_number(headers, "x-ratelimit-remaining-tokens")
+        if all(value is None for value in (limit_requests, limit_tokens,
+                                           remaining_requests, remaining_tokens)):
+            return
+        self.quota_updates += 1
+        self.requests.sync(limit_requests, remaining_requests)
+        self.tokens.sync(limit_tokens, remaining_tokens)
+        # Out of quota: hold everything until the window resets
+        if remaining_requests == 0:
+            self.backoff(_parse_duration(headers.get("x-ratelimit-reset-requests")) or 1.0)
+        if remaining_tokens == 0:
+            self.backoff(_parse_duration(headers.get("x-ratelimit-reset-tokens")) or 1.0)
+
+    def backoff(self, seconds: float):
+        """Pause all admissions, e.g. after a 429"""
+        self.throttled += 1
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def _next(self):
+        """Head of the next chain's queue in round-robin order, dropping cancelled waiters"""
+        while self._queues:
+            chain_id, queue = next(iter(self._queues.items()))
+            while queue and queue[0][1].done():
+                queue.popleft()
+            if queue:
+                return chain_id, queue
+            del self._queues[chain_id]
+        return None, None
+
+    async def _dispatch(self):
+        """Grant waiting requests one at a time as quota allows"""
+        while True:
+            chain_id, queue = self._next()
+            if queue is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            tokens, future = queue[0]
+            wait = max(self.requests.wait_time(1), self.tokens.wait_time(tokens),
+                       self.paused_until - time.monotonic())
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+
+            queue.popleft()
+            self.requests.take(1)
+            self.tokens.take(tokens)
+            future.set_result(None)
+            # This chain goes to the back of the line
+            self._queues.move_to_end(chain_id)
+
+    async def close(self):
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            self._dispatcher = None
+
+    def get_stats(self) -> dict:
+        """Quota and queueing counters"""
+        self.requests._refill()
+        self.tokens._refill()
+        return {
+            "granted": self.granted,
+            "waiting": sum(len(queue) for queue in self._queues.values()),
+            "waiting_chains": len(self._queues),
+            "avg_wait_ms": self.total_wait_ms / self.granted if self.granted else 0.0,
+            "max_wait_ms": self.max_wait_ms,
+            "throttled": self.throttled,
+            "quota_updates": self.quota_updates,
+            "paused_for_s": max(0.0, self.paused_until - time.monotonic()),
+            "requests_per_minute": int(self.requests.capacity),
+            "tokens_per_minute": int(self.tokens.capacity),
+            "requests_available": int(self.requests.level),
+            "tokens_available": int(self.tokens.level),
+        }
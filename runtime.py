@@ -0,0 +1,82 @@
+import asyncio
+from typing import Optional
+import config
+from browser_pool import BrowserPool
+from code_runner import CodeRunner
+from context_builder import load_tokenizer
+from data_processor import DataProcessor
+from download_cache import DownloadCache
+from http_client import get_http_client, close_http_client
+from job_scheduler import JobScheduler
+from llm_cache import LLMCache
+from llm_router import LLMRouter
+from quiz_solver import QuizSolver
+
+class Runtime:
+    """
+    Process-wide resources shared by every concurrently running quiz chain
+
+    Chains get their own QuizSolver (per-chain page cache, metrics and
+    deadline) but share the browser pool, the LLM router (provider clients,
+    backend latency stats and round-robin rate limiters), the download and
+    LLM caches, the data processor's parse caches and the code workers.
+    """
+
+    def __init__(self):
+        self.scheduler = JobScheduler()
+        self.browser_pool = BrowserPool()
+        self.download_cache = DownloadCache()
+        self.llm_cache = LLMCache() if config.LLM_CACHE_ENABLED else None
+        self.llm_router = LLMRouter(rate_limited=True)
+        self.code_runner = CodeRunner() if config.CODE_EXECUTION_ENABLED else None
+        self.processor = DataProcessor()
+
+    def new_solver(self, chain_id: Optional[str] = None) -> QuizSolver:
+        """Create a solver for one chain, wired to the shared resources"""
+        return QuizSolver(
+            browser_pool=self.browser_pool,
+            download_cache=self.download_cache,
+            llm_cache=self.llm_cache,
+            code_runner=self.code_runner,
+            llm_router=self.llm_router,
+            processor=self.processor,
+            chain_id=chain_id
+        )
+
+    async def start(self):
+        """Start the job workers, the browser pool, the tokenizer and the code workers"""
+        self.scheduler.start()
+        try:
+            await self.browser_pool.start()
+        except Exception as e:
+            # Solvers will retry starting the pool on their first lease
+            print(f"Could not start browser pool: {e}")
+        # Load the tokenizer in a thread now, so no request downloads it on the event loop
+        await asyncio.to_thread(load_tokenizer)
+        if self.code_runner:
+            # Warm the workers now so the first question does not pay the pandas import
+            try:
+                await self.code_runner.start()
+            except Exception as e:
+                print(f"Could not start code runner: {e}")
+
+    async def stop(self):
+        """Stop the job workers and release all shared resources"""
+        await self.scheduler.stop()
+        await self.browser_pool.stop()
+        if self.code_runner:
+            await self.code_runner.stop()
+        await self.llm_router.close()
+        await close_http_client()
+
+    def get_stats(self) -> dict:
+        """Metrics for all shared resources"""
+        return {
+            "jobs": self.scheduler.get_stats(),
+            "browser_pool": self.browser_pool.get_stats(),
+            "download_cache": self.download_cache.get_stats(),
+            "http": get_http_client().get_stats(),
+            "llm_cache": self.llm_cache.get_stats() if self.llm_cache else None,
+            "llm_router": self.llm_router.get_stats(),
+            "code_runner": self.code_runner.get_stats() if self.code_runner else None
+        }
@@ -3,6 +3,7 @@ import aiohttp
 from bs4 import BeautifulSoup
 import logging
 from typing import Optional
+from http_client import get_http_client
 
 logger = logging.getLogger(__name__)
 
@@ -10,20 +11,18 @@ class SimpleBrowserHandler:
     """Simplified browser handler using aiohttp + BeautifulSoup for Vercel deployment"""
     
     def __init__(self):
-        self.session = None
+        self.http = None
+        self.headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+        }
     
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=30),
-            headers={
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-        )
+        # Connections stay in the shared pool for the next handler
+        self.http = get_http_client()
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
-            await self.session.close()
+        self.http = None
     
     async def get_page_content(self, url: str) -> Optional[str]:
         """
@@ -32,7 +31,8 @@ class SimpleBrowserHandler:
         try:
             logger.info(f"Fetching content from: {url}")
             
-            async with self.session.get(url) as response:
+            async with self.http.request("GET", url, headers=self.headers,
+                                         timeout=aiohttp.ClientTimeout(total=30)) as response:
                 if response.status == 200:
                     content = await response.text()
                     
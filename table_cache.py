@@ -0,0 +1,175 @@
+import hashlib
+import os
+import tempfile
+from typing import Callable, Iterator, Optional
+import pandas as pd
+import config
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:  # Sidecars need pyarrow; without it every read parses the source
+    pa = None
+
+class SidecarWriter:
+    """Writes DataFrame chunks into an Arrow IPC sidecar as they stream past"""
+
+    def __init__(self, final_path: str, tmp_dir: str):
+        self.final_path = final_path
+        fd, self.tmp_path = tempfile.mkstemp(dir=tmp_dir, suffix=".arrow")
+        os.close(fd)
+        self.writer = None
+        self.sink = None
+        self.schema = None
+        self.failed = False
+
+    def append(self, chunk: pd.DataFrame):
+        """Add a chunk; a schema change part way through abandons the sidecar"""
+        if self.failed:
+            return
+        if not all(isinstance(col, str) for col in chunk.columns):
+            # Arrow stores labels as strings, so e.g. headerless 0..n columns would not round-trip
+            self.abort()
+            return
+        try:
+            if self.writer is None:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                self.schema = table.schema
+                self.sink = pa.OSFile(self.tmp_path, "wb")
+                self.writer = pa.ipc.new_file(self.sink, self.schema)
+            else:
+                table = pa.Table.from_pandas(chunk, schema=self.schema, preserve_index=False)
+            self.writer.write_table(table)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError) as e:
+            print(f"Not caching table sidecar: {e}")
+            self.abort()
+
+    def tee(self, chunks: Iterator[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        """Pass chunks through unchanged while writing them"""
+        for chunk in chunks:
+            self.append(chunk)
+            yield chunk
+
+    def commit(self):
+        """Atomically publish the sidecar"""
+        if self.failed or self.writer is None:
+            self.abort()
+            return
+        self.writer.close()
+        self.sink.close()
+        os.replace(self.tmp_path, self.final_path)
+
+    def abort(self):
+        """Discard the partial sidecar"""
+        self.failed = True
+        try:
+            if self.writer is not None:
+                self.writer.close()
+            if self.sink is not None:
+                self.sink.close()
+        except Exception:
+            pass
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+class TableCache:
+    """Arrow IPC sidecars for tabular files, keyed by content hash and read via memory-mapping"""
+
+    def __init__(self, root: str = None):
+        self.root = root or config.TABLE_CACHE_DIR
+        self.enabled = pa is not None
+        self._hashes: dict = {}
+        self.hits = 0
+        self.misses = 0
+        if self.enabled:
+            os.makedirs(self.root, exist_ok=True)
+
+    def file_hash(self, path: str) -> str:
+        """SHA-256 of the source file, memoized by path, size and modification time"""
+        stat = os.stat(path)
+        key = (path, stat.st_size, stat.st_mtime)
+        if key not in self._hashes:
+            digest = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(chunk)
+            self._hashes[key] = digest.hexdigest()
+        return self._hashes[key]
+
+    def sidecar_path(self, path: str, variant: str = "") -> str:
+        """Where the sidecar for a file (and e.g. Excel sheet) lives"""
+        suffix = f"-{hashlib.sha1(variant.encode()).hexdigest()[:12]}" if variant else ""
+        return os.path.join(self.root, f"{self.file_hash(path)}{suffix}.arrow")
+
+    def read(self, path: str, columns: list = None, variant: str = "") -> Optional[pd.DataFrame]:
+        """Memory-map the sidecar and load only the requested columns, or None if not cached"""
+        if not self.enabled:
+            return None
+        sidecar = self.sidecar_path(path, variant)
+        if not os.path.exists(sidecar):
+            self.misses += 1
+            return None
+        with pa.memory_map(sidecar, "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+            if columns:
+                table = table.select(columns)
+            df = table.to_pandas()
+        self.hits += 1
+        return df
+
+    def iter_chunks(self, path: str, columns: list = None,
+                    variant: str = "") -> Optional[Iterator[pd.DataFrame]]:
+        """Iterate the sidecar's record batches as DataFrames, or None if not cached"""
+        if not self.enabled:
+            return None
+        sidecar = self.sidecar_path(path, variant)
+        if not os.path.exists(sidecar):
+            self.misses += 1
+            return None
+        self.hits += 1
+
+        def chunks():
+            offset = 0
+            with pa.memory_map(sidecar, "r") as source:
+                reader = pa.ipc.open_file(source)
+                for index in range(reader.num_record_batches):
+                    batch = reader.get_batch(index)
+                    if columns:
+                        batch = batch.select(columns)
+                    df = batch.to_pandas()
+                    # Keep row labels running across batches like read_csv(chunksize=...)
+                    df.index = pd.RangeIndex(offset, offset + len(df))
+                    offset += len(df)
+                    yield df
+        return chunks()
+
+    def writer(self, path: str, variant: str = "") -> Optional[SidecarWriter]:
+        """Start writing a sidecar for a file, or None when sidecars are unavailable"""
+        if not self.enabled:
+            return None
+        return SidecarWriter(self.sidecar_path(path, variant), self.root)
+
+    def load(self, path: str, loader: Callable[[], pd.DataFrame], columns: list = None,
+             variant: str = "") -> pd.DataFrame:
+        """
+        Read a table through the sidecar cache
+
+        Args:
+            path: Source file path
+            loader: Parses the source file when there is no sidecar yet
+            columns: Columns to load (all if None)
+            variant: Distinguishes several tables from one file, e.g. Excel sheets
+
+        Returns:
+            The table, restricted to the requested columns
+        """
+        df = self.read(path, columns, variant)
+        if df is not None:
+            return df
+
+        df = loader()
+        writer = self.writer(path, variant)
+        if writer is not None and len(df.columns):
+            writer.append(df)
+            writer.commit()
+        return df[columns] if columns else df
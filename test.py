@@ -85,6 +85,57 @@ async def test_llm():
     except Exception as e:
         print(f"✗ LLM test failed: {e}")
 
+def bench_links(runs: int = 20):
+    """Microbenchmark the single-pass link scanner against the old multi-pass regexes"""
+    import re
+    import timeit
+    from link_scanner import scan_links
+    
+    # The per-call patterns and nested extension checks the scanner replaced
+    def legacy_files(text):
+        urls = re.findall(r'href=["\']([^"\']+)["\']', text)
+        urls.extend(re.findall(r'https?://[^\s<>"{}|\\^`\[\]]+', text))
+        extensions = ['.pdf', '.csv', '.xlsx', '.xls', '.json', '.txt', '.zip']
+        return list(set(url for url in urls if any(ext in url.lower() for ext in extensions)))
+        
+    def legacy_submit(text):
+        for pattern in [r'Post your answer to (https?://[^\s<>"{}|\\^`\[\]]+)',
+                        r'submit[^h]+(https?://[^\s<>"{}|\\^`\[\]]+)',
+                        r'POST[^h]+(https?://[^\s<>"{}|\\^`\[\]]+)']:
+            matches = re.findall(pattern, text, re.IGNORECASE)
+            if matches:
+                return matches[0]
+        return None
+        
+    section = ('<div class="row"><p>Row {i}: see <a href="/docs/page-{i}">details</a> and '
+               'https://example.com/archive/{i}/notes for background text that fills the page.</p>'
+               '<a href="https://example.com/files/data-{i}.csv">data</a></div>\n')
+    
+    print(f"\nBenchmarking link extraction (best of {runs} runs)...")
+    for sections in (10, 5000):
+        page = ("<html><body>" + "".join(section.format(i=i) for i in range(sections))
+                + "<p>Post your answer to https://example.com/submit</p></body></html>")
+        number = max(1, 20000 // sections)
+        legacy_ms = min(timeit.repeat(lambda: legacy_files(page), number=number, repeat=runs))
+        submit_ms = min(timeit.repeat(lambda: legacy_submit(page), number=number, repeat=runs))
+        scan_ms = min(timeit.repeat(lambda: scan_links(page, "https://example.com/quiz"),
+                                    number=number, repeat=runs))
+        legacy_ms, submit_ms, scan_ms = (t * 1000 / number for t in (legacy_ms, submit_ms, scan_ms))
+        # One legacy scan is the file pass plus the submit pass, as one hop ran them
+        print(f"  {len(page) / 1000:8.1f} KB page: legacy {legacy_ms + submit_ms:7.2f} ms/scan | "
+              f"scan_links {scan_ms:7.2f} ms/scan")
+        result = scan_links(page, "https://example.com/quiz")
+        assert len(result["files"]) == len(legacy_files(page)) == sections
+        assert result["submit"] == legacy_submit(page) == "https://example.com/submit"
+
+    # Words that only contain a cue ('host', 'ghost') must not choose the endpoint
+    for text in ("<p>Ask your host about https://example.com/about before you start. "
+                 "When done, send it to https://example.com/submit</p>",
+                 "<p>The ghost page https://example.com/data-info lists the rows. "
+                 "Send the total to https://example.com/submit</p>"):
+        assert scan_links(text, "https://example.com/quiz")["submit"] == "https://example.com/submit", text
+    print("  Cue regression checks passed")
+
 def main():
     """Run tests based on command line arguments"""
     if len(sys.argv) > 1:
@@ -96,9 +147,11 @@ def main():
             asyncio.run(test_llm())
         elif test_type == "demo":
             asyncio.run(test_demo_quiz())
+        elif test_type == "links":
+            bench_links()
         else:
             print(f"Unknown test type: {test_type}")
-            print("Available tests: browser, llm, demo")
+            print("Available tests: browser, llm, demo, links")
     else:
         # Run all tests
         print("Running all tests...\n")
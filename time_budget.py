@@ -0,0 +1,127 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Optional
+import config
+
+# Hop stages in order: (share weight, minimum seconds to keep for the stage, ceiling seconds)
+STAGES = {
+    "render": (0.2, 5.0, 35.0),
+    "download": (0.2, 2.0, float(config.DOWNLOAD_TIMEOUT_SECONDS)),
+    "solve": (0.45, 5.0, None),
+    "submit": (0.15, 3.0, 30.0),
+}
+
+class BudgetExceeded(asyncio.TimeoutError):
+    """Raised when a stage has no time left or runs past its allotment"""
+
+class TimeBudget:
+    """
+    Splits the time left before a chain's deadline between the stages of each hop
+
+    Each stage gets its weighted share of what remains, after keeping the
+    minimum for the stages still to come in the hop, capped at the stage
+    ceiling. When too little is left to keep those minimums, stages fall back
+    to a plain weighted share. Stages run under that timeout and are
+    cancelled when it passes.
+    """
+
+    def __init__(self, deadline: float, safety_seconds: float = None):
+        """
+        Args:
+            deadline: time.monotonic() value by which the chain must be done
+            safety_seconds: Kept back from the deadline for the final submit round trip
+        """
+        safety = config.BUDGET_SAFETY_SECONDS if safety_seconds is None else safety_seconds
+        self.deadline = deadline - safety
+        self.hops: list = []
+        self._pending: list = []
+        self._timings: dict = {}
+
+    @classmethod
+    def from_start(cls, start_monotonic: float, total_seconds: float = None) -> "TimeBudget":
+        """Budget for a chain that started at start_monotonic"""
+        return cls(start_monotonic + (total_seconds or config.TIMEOUT_SECONDS))
+
+    def remaining(self) -> float:
+        return max(0.0, self.deadline - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def start_hop(self):
+        """Begin a new hop with all stages pending"""
+        self._pending = list(STAGES)
+        self._timings = {}
+
+    def allot(self, stage: str) -> float:
+        """Seconds the stage may use, given what the rest of the hop still needs"""
+        weight, minimum, ceiling = STAGES[stage]
+        later = self._pending[self._pending.index(stage) + 1:] if stage in self._pending else []
+        share = weight / sum(STAGES[name][0] for name in [stage] + later)
+        remaining = self.remaining()
+        reserved = max(0.0, remaining - sum(STAGES[name][1] for name in later)) * share
+        seconds = max(reserved, min(minimum, remaining * share))
+        return min(seconds, ceiling) if ceiling else seconds
+
+    def allows(self, expected_seconds: float) -> bool:
+        """Whether something expected to take this long still fits"""
+        return expected_seconds < self.remaining()
+
+    def min_hop_seconds(self) -> float:
+        """Time a hop needs at the very least"""
+        return sum(minimum for _, minimum, _ in STAGES.values())
+
+    def average_hop_seconds(self) -> Optional[float]:
+        """Mean wall time of the hops finished so far"""
+        if not self.hops:
+            return None
+        return sum(sum(hop.values()) for hop in self.hops) / len(self.hops)
+
+    async def run(self, stage: str, func: Callable[[float], Awaitable]):
+        """
+        Run a stage under its allotment
+
+        Args:
+            stage: Stage name from STAGES
+            func: Called with the allotted seconds, so it can pass them to Playwright,
+                  aiohttp or the OpenAI client; its awaitable is cancelled at the limit
+
+        Returns:
+            Whatever func's awaitable returns
+
+        Raises:
+            BudgetExceeded: If there is no time left or the stage overruns; timeouts
+                raised inside the stage propagate unchanged
+        """
+        timeout = self.allot(stage)
+        if timeout <= 0:
+            raise BudgetExceeded(f"no time left for {stage}")
+        start = time.monotonic()
+        # A task and asyncio.wait rather than wait_for, so a TimeoutError raised inside
+        # the stage (e.g. by aiohttp) propagates as is instead of looking like an overrun
+        task = asyncio.ensure_future(func(timeout))
+        try:
+            done, _ = await asyncio.wait({task}, timeout=timeout)
+            if not done:
+                task.cancel()
+                # Let the stage unwind, as wait_for would, before reporting the overrun
+                await asyncio.wait({task})
+                if task.cancelled():
+                    raise BudgetExceeded(f"{stage} exceeded its {timeout:.1f}s budget")
+            return task.result()
+        finally:
+            # Stops the stage if this run itself was cancelled
+            task.cancel()
+            self._timings[stage] = self._timings.get(stage, 0.0) + time.monotonic() - start
+            if stage in self._pending:
+                self._pending.remove(stage)
+
+    def end_hop(self) -> dict:
+        """Record and log the hop's per-stage times"""
+        timings = self._timings
+        self.hops.append(timings)
+        breakdown = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in timings.items())
+        print(f"Hop timing: {breakdown or 'no stages'} "
+              f"(total {sum(timings.values()):.2f}s, {self.remaining():.1f}s left)")
+        self.start_hop()
+        return timings